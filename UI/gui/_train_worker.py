@@ -0,0 +1,38 @@
+"""
+Entrenamiento YOLO en un proceso aparte (método Python de TrainingWorker)
+
+Se ejecuta con el mismo intérprete que la interfaz para que ultralytics/torch
+se carguen solo en este proceso hijo y no en el de la GUI.
+
+Uso: python _train_worker.py <modelo> <argumentos de model.train en JSON> [--resume <last.pt>]
+"""
+
+import json
+import sys
+
+def main(argv):
+    """Entrenar (o reanudar) y devolver el código de salida"""
+    try:
+        from ultralytics import YOLO
+    except ImportError:
+        print("❌ ultralytics no está instalado", flush=True)
+        return 2
+
+    model_name = argv[1]
+    train_args = json.loads(argv[2])
+
+    # Un entrenamiento interrumpido con la misma configuración se reanuda
+    if len(argv) > 4 and argv[3] == "--resume":
+        print(f"♻️ Reanudando entrenamiento desde {argv[4]}", flush=True)
+        try:
+            YOLO(argv[4]).train(resume=True)
+            return 0
+        except Exception as e:
+            # Run terminado ("nothing to resume") o checkpoint no reanudable
+            print(f"⚠️ No se pudo reanudar ({e}); entrenando desde cero", flush=True)
+
+    YOLO(model_name).train(**train_args)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
@@ -879,16 +879,16 @@ class AdvancedImageViewer(QDialog):
             
             # USAR EXACTAMENTE LOS MISMOS RANGOS que analysis_tab.py
             # Verde saludable
-            lower_healthy = np.array([40, 40, 40])
-            upper_healthy = np.array([80, 255, 255])
+            lower_healthy = (40, 40, 40)
+            upper_healthy = (80, 255, 255)
             
             # Amarillo/marrón (enfermedad leve) 
-            lower_disease1 = np.array([15, 40, 40])
-            upper_disease1 = np.array([35, 255, 255])
+            lower_disease1 = (15, 40, 40)
+            upper_disease1 = (35, 255, 255)
             
             # Marrón oscuro/negro (necrosis severa)
-            lower_disease2 = np.array([0, 0, 0])
-            upper_disease2 = np.array([15, 255, 100])
+            lower_disease2 = (0, 0, 0)
+            upper_disease2 = (15, 255, 100)
             
             # Crear máscaras individuales (EXACTAMENTE igual que analysis_tab.py)
             mask_healthy_cv = cv2.inRange(hsv, lower_healthy, upper_healthy)
@@ -22,6 +22,26 @@ import matplotlib.pyplot as plt
 from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
 from matplotlib.figure import Figure
 
+# Extensiones de los recortes contados por categoría
+CROP_IMAGE_EXTENSIONS = frozenset(('.jpg', '.png'))
+
+def count_crop_images(directory):
+    """Contar recortes de un directorio en una sola pasada con os.scandir"""
+    with os.scandir(directory) as entries:
+        return sum(1 for entry in entries
+                   if entry.name[entry.name.rfind('.'):].lower() in CROP_IMAGE_EXTENSIONS and entry.is_file())
+
+def label_masks(mask_healthy, mask_disease1, mask_disease2):
+    """Combinar las tres máscaras en una imagen de etiquetas (0 fondo, 1 sano, 2 leve, 3 severo)
+
+    Las máscaras se aplican en orden, así que en los solapamientos gana la más severa.
+    """
+    labels = np.zeros(mask_healthy.shape, dtype=np.uint8)
+    np.putmask(labels, mask_healthy > 0, 1)
+    np.putmask(labels, mask_disease1 > 0, 2)
+    np.putmask(labels, mask_disease2 > 0, 3)
+    return labels
+
 class AnalysisWorker(QThread):
     """Worker thread para análisis de plantas"""
     
@@ -393,16 +413,16 @@ class ImageDisplayWidget(QLabel):
             
             # Definir rangos de color para plantas
             # Verde saludable
-            lower_healthy = np.array([40, 40, 40])
-            upper_healthy = np.array([80, 255, 255])
+            lower_healthy = (40, 40, 40)
+            upper_healthy = (80, 255, 255)
             
             # Amarillo/marrón (enfermedad leve)
-            lower_disease1 = np.array([15, 40, 40])
-            upper_disease1 = np.array([35, 255, 255])
+            lower_disease1 = (15, 40, 40)
+            upper_disease1 = (35, 255, 255)
             
             # Marrón oscuro/negro (necrosis severa)
-            lower_disease2 = np.array([0, 0, 0])
-            upper_disease2 = np.array([15, 255, 100])
+            lower_disease2 = (0, 0, 0)
+            upper_disease2 = (15, 255, 100)
             
             # Crear máscaras
             mask_healthy_cv = cv2.inRange(hsv, lower_healthy, upper_healthy)
@@ -862,8 +882,7 @@ class AnalysisTab(QWidget):
                 categories = {}
                 for category_dir in crops_path.iterdir():
                     if category_dir.is_dir():
-                        count = len(list(category_dir.glob("*.jpg"))) + len(list(category_dir.glob("*.png")))
-                        categories[category_dir.name] = count
+                        categories[category_dir.name] = count_crop_images(category_dir)
                 
                 info_text += "🔍 Crops encontrados:\n"
                 for category, count in categories.items():
@@ -1756,16 +1775,16 @@ class AnalysisTab(QWidget):
             
             # Definir rangos de color para plantas
             # Verde saludable
-            lower_healthy = np.array([35, 40, 40])
-            upper_healthy = np.array([80, 255, 255])
+            lower_healthy = (35, 40, 40)
+            upper_healthy = (80, 255, 255)
             
             # Amarillo/marrón (enfermedad)
-            lower_disease1 = np.array([15, 40, 40])
-            upper_disease1 = np.array([35, 255, 255])
+            lower_disease1 = (15, 40, 40)
+            upper_disease1 = (35, 255, 255)
             
             # Marrón oscuro/negro (necrosis)
-            lower_disease2 = np.array([0, 0, 0])
-            upper_disease2 = np.array([19, 255, 200])
+            lower_disease2 = (0, 0, 0)
+            upper_disease2 = (19, 255, 200)
             
             # Crear máscaras
             mask_healthy = cv2.inRange(hsv, lower_healthy, upper_healthy)
@@ -1799,12 +1818,8 @@ class AnalysisTab(QWidget):
             
             # Crear mapa de intensidad de afectación
             # 0 = fondo, 1 = saludable, 2 = enfermedad leve, 3 = enfermedad severa
-            intensity_map = np.zeros((image_rgb.shape[0], image_rgb.shape[1]), dtype=np.float32)
-            
-            # Asignar valores de intensidad
-            intensity_map[mask_healthy > 0] = 1.0    # Saludable
-            intensity_map[mask_disease1 > 0] = 2.0   # Enfermedad leve
-            intensity_map[mask_disease2 > 0] = 3.0   # Enfermedad severa (máxima prioridad)
+            # (la etiqueta ya es la intensidad; la severa tiene máxima prioridad)
+            intensity_map = label_masks(mask_healthy, mask_disease1, mask_disease2).astype(np.float32)
             
             # Crear suavizado gaussiano para efecto de calor
             from scipy import ndimage
@@ -1866,26 +1881,16 @@ class AnalysisTab(QWidget):
             # Crear imagen base con transparencia
             result = image_rgb.copy().astype(np.float32)
             
-            # Crear capas de color con gradientes
-            overlay = np.zeros_like(result, dtype=np.float32)
-            
-            # Verde suave para saludable
-            overlay[mask_healthy > 0] = [0, 200, 0]
-            
-            # Amarillo-naranja para enfermedad leve
-            overlay[mask_disease1 > 0] = [255, 200, 0]
-            
-            # Rojo intenso para enfermedad severa
-            overlay[mask_disease2 > 0] = [255, 80, 0]
+            # Color y alpha por etiqueta (fondo, saludable, leve, severa): una consulta por tabla
+            labels = label_masks(mask_healthy, mask_disease1, mask_disease2)
+            palette = np.array([[0, 0, 0], [0, 200, 0], [255, 200, 0], [255, 80, 0]], dtype=np.float32)
+            alpha_levels = np.array([0.0, 0.6, 0.7, 0.8], dtype=np.float32)
             
-            # Suavizar con filtro gaussiano básico de OpenCV
-            overlay = cv2.GaussianBlur(overlay, (5, 5), 1.5)
+            # Crear capas de color y suavizar con filtro gaussiano básico de OpenCV
+            overlay = cv2.GaussianBlur(palette[labels], (5, 5), 1.5)
             
             # Crear máscara alpha basada en intensidad
-            alpha = np.zeros((result.shape[0], result.shape[1]), dtype=np.float32)
-            alpha[mask_healthy > 0] = 0.6
-            alpha[mask_disease1 > 0] = 0.7
-            alpha[mask_disease2 > 0] = 0.8
+            alpha = alpha_levels[labels]
             
             # Suavizar alpha
             alpha = cv2.GaussianBlur(alpha, (5, 5), 1.5)
@@ -1899,11 +1904,9 @@ class AnalysisTab(QWidget):
         except Exception as e:
             print(f"Error en mapa simple: {e}")
             # Último fallback - colores planos
-            analysis = image_rgb.copy()
-            analysis[mask_healthy > 0] = [0, 255, 0]
-            analysis[mask_disease1 > 0] = [255, 255, 0]
-            analysis[mask_disease2 > 0] = [255, 0, 0]
-            return analysis
+            labels = label_masks(mask_healthy, mask_disease1, mask_disease2)
+            palette = np.array([[0, 0, 0], [0, 255, 0], [255, 255, 0], [255, 0, 0]], dtype=np.uint8)
+            return np.where(labels[..., None] > 0, palette[labels], image_rgb)
     
     def load_available_crops(self, predict_dir, image_num, category):
         """Cargar recortes disponibles para la imagen seleccionada"""
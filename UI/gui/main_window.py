@@ -109,7 +109,7 @@ class MainWindow(QMainWindow):
         # EDITAR AQUÍ: Cambiar nombres o iconos de pestañas
         self.tab_widget.addTab(self.train_tab, "🏋️ Entrenamiento")
         self.tab_widget.addTab(self.predict_tab, "🔍 Predicción")
-        self.tab_widget.addTab(self.analysis_tab, "📊 Análisis")
+        self._analysis_tab_index = self.tab_widget.addTab(self.analysis_tab, "📊 Análisis")
         self.tab_widget.addTab(self.results_tab, "📈 Resultados")
         
         parent_layout.addWidget(self.tab_widget)
@@ -8,21 +8,25 @@ from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QGroupBox,
                              QFileDialog, QMessageBox, QSplitter, QFrame,
                              QScrollArea)
 from PyQt6.QtCore import Qt, QThread, pyqtSignal
-from PyQt6.QtGui import QFont
+from PyQt6.QtGui import QFont, QFontDatabase
 
 import os
 from pathlib import Path
 from utils.config import config
 from utils.yolo_utils import YOLOProcessor
 
+# Máximo de líneas conservadas en el log (las más antiguas se descartan)
+LOG_MAX_BLOCKS = 2000
+
 class PredictionWorker(QThread):
     """Worker thread para predicción"""
     
     progress_update = pyqtSignal(str)
     prediction_completed = pyqtSignal(bool, str)
     
-    def __init__(self, source_path, model_path, conf, save_crops, classes):
+    def __init__(self, source_path, model_path, conf, save_crops, classes, preload_worker=None):
         super().__init__()
+        self.preload_worker = preload_worker
         self.source_path = source_path
         self.model_path = model_path
         self.conf = conf
@@ -35,6 +39,10 @@ class PredictionWorker(QThread):
         try:
             self.progress_update.emit("Iniciando predicción...")
             
+            # El modelo no se usa en dos hilos a la vez: esperar a que termine su precarga
+            if self.preload_worker is not None:
+                self.preload_worker.wait()
+            
             results_path = self.yolo_processor.predict_images(
                 self.source_path, self.model_path, self.conf, 
                 self.save_crops, self.classes
@@ -51,6 +59,18 @@ class PredictionWorker(QThread):
             self.progress_update.emit(f"Error: {str(e)}")
             self.prediction_completed.emit(False, "")
 
+class ModelPreloadWorker(QThread):
+    """Worker para cargar y calentar el modelo elegido antes de predecir"""
+    
+    def __init__(self, model_path):
+        super().__init__()
+        self.model_path = model_path
+        self.yolo_processor = YOLOProcessor()
+    
+    def run(self):
+        """Ejecutar precarga"""
+        self.yolo_processor.preload_model(self.model_path)
+
 class PredictTab(QWidget):
     """Pestaña para predicción con modelos"""
     
@@ -60,6 +80,7 @@ class PredictTab(QWidget):
         super().__init__()
         self.yolo_processor = YOLOProcessor()
         self.prediction_worker = None
+        self.preload_worker = None
         self.current_source_path = ""
         self.setup_ui()
         self.load_existing_predictions()
@@ -119,6 +140,8 @@ class PredictTab(QWidget):
         self.model_combo = QComboBox()
         self.model_combo.setMinimumHeight(25)  # Altura mínima para visibilidad
         self.load_available_models()
+        # Solo al elegir un modelo a mano (activated no se emite al rellenar la lista)
+        self.model_combo.activated.connect(self.preload_selected_model)
         model_layout.addRow("Modelo:", self.model_combo)
         
         refresh_models_btn = QPushButton("🔄 Actualizar")
@@ -313,7 +336,12 @@ class PredictTab(QWidget):
         
         self.log_text = QTextEdit()
         self.log_text.setReadOnly(True)
-        self.log_text.setFont(QFont("Consolas", 8))  # Fuente más pequeña
+        # Fuente monoespaciada del sistema (evita buscar "Consolas" fuera de Windows)
+        log_font = QFontDatabase.systemFont(QFontDatabase.SystemFont.FixedFont)
+        log_font.setPointSize(8)  # Fuente más pequeña
+        self.log_text.setFont(log_font)
+        self.log_text.setLineWrapMode(QTextEdit.LineWrapMode.NoWrap)  # Sin re-ajuste de líneas al redimensionar
+        self.log_text.document().setMaximumBlockCount(LOG_MAX_BLOCKS)  # Limitar memoria
         self.log_text.setStyleSheet("""
             color: #000000;
             background-color: #ffffff;
@@ -431,6 +459,20 @@ class PredictTab(QWidget):
         
         return None
     
+    def preload_selected_model(self):
+        """Cargar en segundo plano el modelo elegido para que la primera predicción no espere"""
+        if self.preload_worker and self.preload_worker.isRunning():
+            return
+        if self.prediction_worker and self.prediction_worker.isRunning():
+            return
+        
+        model_path = self.get_selected_model_path()
+        if not model_path or not Path(model_path).exists():
+            return
+        
+        self.preload_worker = ModelPreloadWorker(model_path)
+        self.preload_worker.start()
+    
     def start_prediction(self):
         """Iniciar predicción"""
         if not self.current_source_path:
@@ -456,7 +498,8 @@ class PredictTab(QWidget):
         
         # Crear y iniciar worker
         self.prediction_worker = PredictionWorker(
-            self.current_source_path, model_path, conf, save_crops, selected_classes
+            self.current_source_path, model_path, conf, save_crops, selected_classes,
+            self.preload_worker
         )
         
         self.prediction_worker.progress_update.connect(self.update_progress)
@@ -5,22 +5,92 @@ Pestaña de visualización de resultados y comparaciones
 from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QGroupBox, 
                              QPushButton, QLabel, QComboBox, QScrollArea,
                              QGridLayout, QFrame, QTabWidget,
-                             QTextEdit, QMessageBox, QCheckBox, QFormLayout)
-from PyQt6.QtCore import Qt
-from PyQt6.QtGui import QFont, QPixmap
+                             QTextEdit, QMessageBox, QCheckBox, QFormLayout,
+                             QProgressDialog, QFileDialog, QDialog, QSlider,
+                             QToolTip)
+from PyQt6.QtCore import Qt, QUrl, QThread, QEvent, pyqtSignal
+from PyQt6.QtGui import QFont, QPixmap, QDesktopServices, QImageReader
 
+import os
+import sys
 from pathlib import Path
 from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
 from matplotlib.figure import Figure
 
 from utils.config import config
 
+# Extensiones de imagen mostradas en la galería
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png')
+
+# Tamaño de bloque para copiar modelos exportados
+COPY_BUFFER_SIZE = 4 * 1024 * 1024
+
+class CopyWorker(QThread):
+    """Worker thread para copiar archivos grandes por bloques"""
+    
+    progress_update = pyqtSignal(int)
+    copy_completed = pyqtSignal(bool, str)
+    
+    def __init__(self, src_path, dst_path):
+        super().__init__()
+        self.src_path = src_path
+        self.dst_path = dst_path
+    
+    def run(self):
+        """Ejecutar copia reportando el porcentaje por bloque"""
+        # Se escribe en un archivo temporal junto al destino y se renombra al terminar:
+        # una copia que falla a medias no deja un archivo truncado con el nombre final
+        tmp_path = f"{self.dst_path}.part"
+        try:
+            total_size = os.path.getsize(self.src_path) or 1
+            copied = 0
+            
+            with open(self.src_path, 'rb') as src, open(tmp_path, 'wb') as dst:
+                while True:
+                    chunk = src.read(COPY_BUFFER_SIZE)
+                    if not chunk:
+                        break
+                    dst.write(chunk)
+                    copied += len(chunk)
+                    self.progress_update.emit(int(copied * 100 / total_size))
+            
+            os.replace(tmp_path, self.dst_path)
+            self.copy_completed.emit(True, self.dst_path)
+        except Exception as e:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass  # No llegó a crearse
+            self.copy_completed.emit(False, str(e))
+
+def load_thumbnail(image_path, width, height):
+    """
+    Cargar una miniatura decodificando la imagen directamente a tamaño reducido
+    
+    Args:
+        image_path: Ruta de la imagen
+        width: Ancho máximo de la miniatura
+        height: Alto máximo de la miniatura
+        
+    Returns:
+        QPixmap: Miniatura (nula si la imagen no se pudo leer)
+    """
+    reader = QImageReader(str(image_path))
+    size = reader.size()
+    if size.isValid():
+        # Con JPEG el decodificador escala por bloques DCT en lugar de decodificar completo
+        size.scale(width, height, Qt.AspectRatioMode.KeepAspectRatio)
+        reader.setScaledSize(size)
+    return QPixmap.fromImage(reader.read())
+
 class ClickableImageLabel(QLabel):
     """Label de imagen con funcionalidad de clic"""
     
-    def __init__(self, image_path):
+    def __init__(self, image_path, category=None):
         super().__init__()
-        self.image_path = image_path
+        self.image_path = str(image_path)
+        self.image_name = os.path.basename(self.image_path)
+        self.category = category  # Categoría del recorte (None para predicciones)
         self.setFixedSize(200, 150)
         self.setStyleSheet("""
             QLabel {
@@ -41,17 +111,25 @@ class ClickableImageLabel(QLabel):
     
     def load_image(self):
         """Cargar y mostrar imagen"""
-        pixmap = QPixmap(str(self.image_path))
+        pixmap = load_thumbnail(self.image_path, self.width(), self.height())
         if not pixmap.isNull():
-            scaled_pixmap = pixmap.scaled(
-                self.size(), Qt.AspectRatioMode.KeepAspectRatio, 
-                Qt.TransformationMode.SmoothTransformation
-            )
-            self.setPixmap(scaled_pixmap)
-            self.setToolTip(f"Clic para ampliar: {self.image_path.name}")
+            self.setPixmap(pixmap)
         else:
             self.setText("Error cargando imagen")
     
+    def tooltip_text(self):
+        """Texto del tooltip (se construye solo cuando se va a mostrar)"""
+        if self.category:
+            return f"Categoría: {self.category}\nArchivo: {self.image_name}\nClic para ampliar"
+        return f"Predicción: {self.image_name}"
+    
+    def event(self, event):
+        """Generar el tooltip bajo demanda en lugar de guardarlo por imagen"""
+        if event.type() == QEvent.Type.ToolTip:
+            QToolTip.showText(event.globalPos(), self.tooltip_text(), self)
+            return True
+        return super().event(event)
+    
     def mousePressEvent(self, event):
         """Manejar clic en la imagen"""
         if event.button() == Qt.MouseButton.LeftButton:
@@ -60,12 +138,10 @@ class ClickableImageLabel(QLabel):
     
     def open_image_detail(self):
         """Abrir imagen en ventana de detalle con zoom"""
-        self.create_image_detail_window(str(self.image_path), f"Imagen: {self.image_path.name}")
+        self.create_image_detail_window(self.image_path, f"Imagen: {self.image_name}")
     
     def create_image_detail_window(self, image_path, title):
         """Crear ventana de detalle de imagen con zoom"""
-        from PyQt6.QtWidgets import QDialog, QVBoxLayout, QHBoxLayout, QScrollArea, QPushButton, QSlider
-        
         dialog = QDialog(self)
         dialog.setWindowTitle(title)
         dialog.resize(800, 600)
@@ -473,6 +549,16 @@ class ResultsTab(QWidget):
     
     def __init__(self):
         super().__init__()
+        self.export_worker = None
+        
+        # Rutas de la selección actual (se resuelven una vez por cambio de combo)
+        self._current_training_path = None
+        self._current_training_ok = False
+        self._current_prediction_path = None
+        self._current_prediction_ok = False
+        self._last_gallery_sig = None
+        self._scan_cache = {}
+        
         self.setup_ui()
         self.load_available_results()
     
@@ -675,10 +761,14 @@ class ResultsTab(QWidget):
         """Manejar cambio de selección de entrenamiento"""
         selection = self.training_combo.currentText()
         if not selection:
+            self._current_training_path = None
+            self._current_training_ok = False
             return
         
         # La ruta correcta ya está en RUNS_DIR que apunta a content/runs/detect
         training_path = config.RUNS_DIR / selection
+        self._current_training_path = training_path
+        self._current_training_ok = training_path.exists()
         
         # Actualizar información
         info_text = f"📁 Entrenamiento: {selection}\n"
@@ -737,36 +827,117 @@ class ResultsTab(QWidget):
         """Manejar cambio de selección de predicción"""
         selection = self.prediction_combo.currentText()
         if not selection:
+            self._current_prediction_path = None
+            self._current_prediction_ok = False
             return
         
         prediction_path = config.RUNS_DIR / selection
+        self._current_prediction_path = prediction_path
+        prediction_mtime = self._prediction_mtimes(prediction_path, self.show_crops_check.isChecked())
+        self._current_prediction_ok = prediction_mtime is not None
+        
+        # Evitar reconstruir la galería si nada visible cambió (p.ej. al recargar el combo)
+        gallery_sig = (self.show_crops_check.isChecked(), selection, prediction_mtime)
+        if gallery_sig == self._last_gallery_sig:
+            return
+        self._last_gallery_sig = gallery_sig
         
         # Actualizar información
         info_text = f"📁 Predicción: {selection}\n"
         info_text += f"📍 Ubicación: {prediction_path}\n"
         
-        # Contar imágenes procesadas
-        images_dir = prediction_path
-        if images_dir.exists():
-            image_files = list(images_dir.glob("*.jpg")) + list(images_dir.glob("*.png"))
-            info_text += f"🖼️ Imágenes procesadas: {len(image_files)}\n"
-        
-        # Verificar crops
-        crops_dir = prediction_path / "crops"
-        if crops_dir.exists():
-            crop_count = 0
-            for category_dir in crops_dir.iterdir():
-                if category_dir.is_dir():
-                    category_crops = len(list(category_dir.glob("*.jpg"))) + len(list(category_dir.glob("*.png")))
-                    crop_count += category_crops
-            info_text += f"✂️ Recortes generados: {crop_count}\n"
+        # Enumerar imágenes una sola vez para la información y la galería
+        main_records, crop_records = [], []
+        if self._current_prediction_ok:
+            main_records, crop_records = self._scan_prediction(
+                prediction_path, self.show_crops_check.isChecked(), prediction_mtime
+            )
+            info_text += f"🖼️ Imágenes procesadas: {len(main_records)}\n"
+        
+        # Verificar crops (solo si se van a mostrar, evita recorrer miles de archivos)
+        if self.show_crops_check.isChecked():
+            if (prediction_path / "crops").exists():
+                info_text += f"✂️ Recortes generados: {len(crop_records)}\n"
+        else:
+            info_text += "✂️ Recortes: (oculto)\n"
         
         self.prediction_info.setText(info_text)
         
         # Actualizar galería
-        self.load_prediction_gallery(prediction_path)
+        self.load_prediction_gallery(prediction_path, main_records, crop_records)
+    
+    def _prediction_mtimes(self, prediction_path, include_crops):
+        """
+        Fechas de modificación de las carpetas que enumera _scan_prediction
+        
+        Escribir un recorte en crops/<categoría>/ no cambia la fecha de la carpeta de la
+        predicción: con recortes se incluyen también crops y cada carpeta de categoría.
+        
+        Returns:
+            Tuple: mtimes (ns) de las carpetas, o None si la predicción no existe
+        """
+        try:
+            mtimes = [prediction_path.stat().st_mtime_ns]
+        except OSError:
+            return None
+        
+        if include_crops:
+            crops_root = os.path.join(prediction_path, "crops")
+            try:
+                mtimes.append(os.stat(crops_root).st_mtime_ns)
+                with os.scandir(crops_root) as entries:
+                    mtimes.extend(sorted((entry.name, entry.stat().st_mtime_ns)
+                                         for entry in entries if entry.is_dir()))
+            except OSError:
+                pass  # Sin carpeta de recortes
+        
+        return tuple(mtimes)
     
-    def load_prediction_gallery(self, prediction_path):
+    def _scan_prediction(self, prediction_path, include_crops, prediction_mtime=None):
+        """
+        Enumerar las imágenes de una predicción
+        
+        Returns:
+            Tuple: (registros principales, registros de recortes), cada registro
+            es (ruta, categoría) con categoría None para las predicciones
+        """
+        # Reutilizar el último escaneo si las carpetas no cambiaron (ver _prediction_mtimes)
+        cache_key = (str(prediction_path), prediction_mtime, include_crops)
+        if prediction_mtime is not None and cache_key in self._scan_cache:
+            return self._scan_cache[cache_key]
+        
+        main_records = []
+        with os.scandir(prediction_path) as entries:
+            for entry in entries:
+                if entry.name.lower().endswith(IMAGE_EXTENSIONS) and entry.is_file():
+                    main_records.append((entry.path, None))
+        
+        crop_records = []
+        if include_crops:
+            crops_root = os.path.join(prediction_path, "crops")
+            
+            # Los recortes viven en crops/<categoría>/ (un solo nivel): un os.scandir por carpeta
+            try:
+                with os.scandir(crops_root) as entries:
+                    category_dirs = [entry for entry in entries if entry.is_dir()]
+            except OSError:
+                category_dirs = []  # Sin carpeta de recortes
+            
+            for category_dir in category_dirs:
+                category = sys.intern(category_dir.name)
+                with os.scandir(category_dir.path) as entries:
+                    for entry in entries:
+                        if entry.name.lower().endswith(IMAGE_EXTENSIONS) and entry.is_file():
+                            crop_records.append((entry.path, category))
+        
+        # Conservar solo el último escaneo de la carpeta actual en cada modo (con/sin recortes)
+        self._scan_cache = {k: v for k, v in self._scan_cache.items()
+                            if k[0] == cache_key[0] and k[2] != include_crops}
+        self._scan_cache[cache_key] = (main_records, crop_records)
+        
+        return main_records, crop_records
+    
+    def load_prediction_gallery(self, prediction_path, main_records, crop_records):
         """Cargar galería de imágenes de predicción"""
         # Limpiar galería actual
         for i in reversed(range(self.gallery_layout.count())): 
@@ -776,30 +947,8 @@ class ResultsTab(QWidget):
                 if widget:
                     widget.setParent(None)
         
-        # Buscar imágenes según opciones de visualización
-        image_files = []
-        
-        # Siempre incluir imágenes principales (con predicciones dibujadas)
-        main_images = []
-        for ext in ['*.jpg', '*.jpeg', '*.png', '*.JPG', '*.JPEG', '*.PNG']:
-            main_images.extend(list(prediction_path.glob(ext)))
-        
-        
-        # Agregar recortes si está habilitado
-        crops_images = []
-        if self.show_crops_check.isChecked():
-            crops_dir = prediction_path / "crops"
-            if crops_dir.exists():
-                for category_dir in crops_dir.iterdir():
-                    if category_dir.is_dir():
-                        for ext in ['*.jpg', '*.jpeg', '*.png', '*.JPG', '*.JPEG', '*.PNG']:
-                            crops_images.extend(list(category_dir.glob(ext)))
-            
-            image_files.extend(crops_images)
-        
-        # Si no hay opciones seleccionadas o no hay imágenes, mostrar al menos las principales
-        if not image_files:
-            image_files = main_images
+        # Mostrar recortes si están habilitados; si no hay, al menos las principales
+        image_files = crop_records if crop_records else main_records
         
         # Mostrar TODAS las imágenes encontradas (sin límite de 24)
         total_images = len(image_files)
@@ -815,10 +964,10 @@ class ResultsTab(QWidget):
         # Mostrar información de la galería
         info_label = QLabel(f"Mostrando {total_images} imágenes:")
         info_parts = []
-        if len(main_images) > 0:
-            info_parts.append(f"{len(main_images)} predicciones")
-        if len(crops_images) > 0:
-            info_parts.append(f"{len(crops_images)} recortes")
+        if len(main_records) > 0:
+            info_parts.append(f"{len(main_records)} predicciones")
+        if len(crop_records) > 0:
+            info_parts.append(f"{len(crop_records)} recortes")
         if info_parts:
             info_label.setText(f"Mostrando {total_images} imágenes: " + ", ".join(info_parts))
         
@@ -827,28 +976,9 @@ class ResultsTab(QWidget):
         
         # Crear grid de imágenes clickeables (4 columnas)
         row, col = 1, 0
-        for image_file in image_files:
-            # Crear widget de imagen clickeable
-            image_widget = ClickableImageLabel(image_file)
-            
-            # Agregar información del tipo de imagen
-            if image_file.parent.name == "crops" or "crops" in str(image_file):
-                image_widget.setToolTip(f"Recorte: {image_file.name}\nCategoría: {image_file.parent.name}")
-            else:
-                image_widget.setToolTip(f"Predicción: {image_file.name}")
-            
-            self.gallery_layout.addWidget(image_widget, row, col)
-            
-            # Avanzar posición en grid (4 columnas)
-            col += 1
-            if col >= 4:
-                col = 0
-                row += 1
-            
-            # Agregar título con información del archivo
-            image_title = image_file.parent.name if image_file.parent.name != prediction_path.name else ""
-            if image_title:
-                image_widget.setToolTip(f"Categoría: {image_title}\nArchivo: {image_file.name}\nClic para ampliar")
+        for image_path, category in image_files:
+            # Crear widget de imagen clickeable (el tooltip se genera al pasar el cursor)
+            image_widget = ClickableImageLabel(image_path, category)
             
             # Agregar al grid
             self.gallery_layout.addWidget(image_widget, row, col)
@@ -860,57 +990,62 @@ class ResultsTab(QWidget):
     
     def update_gallery_view(self):
         """Actualizar vista de galería según opciones seleccionadas"""
-        # Obtener predicción actual
-        current_prediction = self.prediction_combo.currentText()
-        if current_prediction:
-            prediction_path = config.RUNS_DIR / current_prediction
-            if prediction_path.exists():
-                self.load_prediction_gallery(prediction_path)
+        # Usar la predicción actual ya resuelta
+        if self._current_prediction_ok:
+            # Recalcular información (el conteo de recortes depende del checkbox) y galería
+            self.on_prediction_selection_changed()
     
     def view_training_folder(self):
         """Abrir carpeta de entrenamiento"""
-        selection = self.training_combo.currentText()
-        if selection:
-            folder_path = config.RUNS_DIR / selection
-            if folder_path.exists():
-                import subprocess
-                subprocess.Popen(f'explorer "{folder_path}"')
+        if self._current_training_ok:
+            QDesktopServices.openUrl(QUrl.fromLocalFile(str(self._current_training_path)))
     
     def view_prediction_folder(self):
         """Abrir carpeta de predicción"""
-        selection = self.prediction_combo.currentText()
-        if selection:
-            folder_path = config.RUNS_DIR / selection
-            if folder_path.exists():
-                import subprocess
-                subprocess.Popen(f'explorer "{folder_path}"')
+        if self._current_prediction_ok:
+            QDesktopServices.openUrl(QUrl.fromLocalFile(str(self._current_prediction_path)))
     
     def export_model(self):
         """Exportar modelo entrenado"""
         selection = self.training_combo.currentText()
-        if not selection:
+        if not selection or self._current_training_path is None:
             QMessageBox.warning(self, "Error", "Seleccione un entrenamiento")
             return
         
-        model_path = config.RUNS_DIR / selection / "weights" / "best.pt"
+        model_path = self._current_training_path / "weights" / "best.pt"
         if not model_path.exists():
             QMessageBox.warning(self, "Error", "Modelo no encontrado")
             return
         
-        from PyQt6.QtWidgets import QFileDialog
-        import shutil
-        
         save_path, _ = QFileDialog.getSaveFileName(
             self, "Exportar modelo", f"{selection}_best.pt",
             "Archivos PyTorch (*.pt)"
         )
         
         if save_path:
-            try:
-                shutil.copy2(model_path, save_path)
-                QMessageBox.information(self, "Éxito", f"Modelo exportado a:\n{save_path}")
-            except Exception as e:
-                QMessageBox.critical(self, "Error", f"Error exportando modelo:\n{str(e)}")
+            # Copiar en un hilo aparte para no congelar la interfaz con modelos grandes
+            self.export_progress = QProgressDialog("Exportando modelo...", None, 0, 100, self)
+            self.export_progress.setWindowTitle("Exportar modelo")
+            self.export_progress.setWindowModality(Qt.WindowModality.WindowModal)
+            self.export_progress.setMinimumDuration(0)
+            self.export_progress.setValue(0)
+            
+            self.export_worker = CopyWorker(str(model_path), save_path)
+            self.export_worker.progress_update.connect(self.export_progress.setValue)
+            self.export_worker.copy_completed.connect(self.on_export_completed)
+            
+            self.export_model_btn.setEnabled(False)
+            self.export_worker.start()
+    
+    def on_export_completed(self, success, message):
+        """Manejar fin de la exportación del modelo"""
+        self.export_progress.close()
+        self.export_model_btn.setEnabled(True)
+        
+        if success:
+            QMessageBox.information(self, "Éxito", f"Modelo exportado a:\n{message}")
+        else:
+            QMessageBox.critical(self, "Error", f"Error exportando modelo:\n{message}")
     
     def analyze_prediction(self):
         """Analizar predicción seleccionada - cambiar a pestaña de análisis"""
@@ -921,22 +1056,18 @@ class ResultsTab(QWidget):
             try:
                 # Obtener la ventana principal y cambiar a la pestaña de análisis
                 main_window = self.window()
-                if hasattr(main_window, 'tab_widget'):
-                    # Buscar el índice de la pestaña de análisis
-                    for i in range(main_window.tab_widget.count()):
-                        if "Análisis" in main_window.tab_widget.tabText(i):
-                            main_window.tab_widget.setCurrentIndex(i)
-                            
-                            # Actualizar la selección en la pestaña de análisis
-                            if hasattr(main_window, 'analysis_tab'):
-                                analysis_tab = main_window.analysis_tab
-                                if hasattr(analysis_tab, 'prediction_combo'):
-                                    # Buscar y seleccionar la predicción
-                                    for j in range(analysis_tab.prediction_combo.count()):
-                                        if analysis_tab.prediction_combo.itemText(j) == selection:
-                                            analysis_tab.prediction_combo.setCurrentIndex(j)
-                                            break
-                            break
+                if hasattr(main_window, 'tab_widget') and hasattr(main_window, '_analysis_tab_index'):
+                    # Índice de la pestaña de análisis registrado al crearla
+                    main_window.tab_widget.setCurrentIndex(main_window._analysis_tab_index)
+                    
+                    # Actualizar la selección en la pestaña de análisis
+                    if hasattr(main_window, 'analysis_tab'):
+                        analysis_tab = main_window.analysis_tab
+                        if hasattr(analysis_tab, 'prediction_combo'):
+                            # Buscar y seleccionar la predicción
+                            index = analysis_tab.prediction_combo.findText(selection)
+                            if index >= 0:
+                                analysis_tab.prediction_combo.setCurrentIndex(index)
                 
                 QMessageBox.information(self, "Análisis", 
                                        f"Cambiando a pestaña de análisis para: {selection}")
@@ -3,170 +3,561 @@ Pestaña de entrenamiento de modelos YOLO
 """
 
 from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QGroupBox, 
-                             QPushButton, QLabel, QComboBox, QSpinBox, 
+                             QPushButton, QLabel, QComboBox, QSpinBox, QCheckBox,
                              QProgressBar, QTextEdit, QFormLayout, QMessageBox, QSplitter, QFrame)
-from PyQt6.QtCore import Qt, QThread, pyqtSignal
-from PyQt6.QtGui import QFont
+from PyQt6.QtCore import Qt, QUrl, QThread, QTimer, pyqtSignal
+from PyQt6.QtGui import QFont, QDesktopServices, QFontDatabase
 
 import os
+import sys
+import json
+import hashlib
+import shutil
 import subprocess
 import time
+from dataclasses import dataclass, replace
 from pathlib import Path
-from datetime import datetime
+from typing import Optional
+from utils.config import config
+
+# Opciones de dispositivo -> valor para el argumento device de ultralytics
+DEVICE_OPTIONS = {
+    "auto": None,   # ultralytics elige CUDA si está disponible
+    "cpu": "cpu",
+    "cuda:0": "0",
+}
+
+# EDITAR COLOR TÍTULO - FIJO (compartido por los títulos de ambos paneles)
+TITLE_QSS = "color: #000000; background-color: #e8f5e8; padding: 8px; border-radius: 4px; font-weight: bold;"
+
+# Intervalo (ms) para agrupar mensajes del log y máximo de líneas conservadas
+LOG_FLUSH_INTERVAL_MS = 100
+LOG_MAX_BLOCKS = 2000
+
+# Las líneas del CLI se envían a la interfaz en lotes de hasta N líneas o cada T segundos
+LOG_BATCH_MAX_LINES = 32
+LOG_BATCH_INTERVAL_S = 0.05
+
+# Intervalo mínimo (s) entre actualizaciones de la etiqueta de estado durante el entrenamiento
+STATUS_UPDATE_INTERVAL_S = 1.0
+
+# Tamaño del buffer de la tubería de salida del CLI (lecturas por bloques, no por carácter)
+CLI_PIPE_BUFFER_SIZE = 64 * 1024
+
+# Bytes finales de stderr que se conservan sin log en vivo (para detectar fallos de torch.compile)
+SILENT_STDERR_TAIL_BYTES = 64 * 1024
+
+# Intervalo máximo (s) de espera de salida del CLI antes de revisar si se pidió detener
+CLI_POLL_INTERVAL_S = 0.1
+
+# Script que ejecuta el método Python de entrenamiento en un proceso hijo
+TRAIN_WORKER_SCRIPT = Path(__file__).with_name("_train_worker.py")
+
+# Extensiones de imagen contadas en el dataset
+DATASET_IMAGE_EXTENSIONS = frozenset(('.jpg', '.jpeg', '.png', '.bmp'))
+
+# Fragmentos de salida que indican un fallo de torch.compile (o una versión de
+# ultralytics sin el argumento compile)
+COMPILE_ERROR_MARKERS = ("torch._dynamo", "inductor", "'compile' is not a valid")
+
+def _is_compile_error(text):
+    """Determinar si un mensaje de error proviene de torch.compile"""
+    text = text.lower()
+    return any(marker.lower() in text for marker in COMPILE_ERROR_MARKERS)
+
+@dataclass(frozen=True)
+class TrainConfig:
+    """Parámetros de un entrenamiento, leídos una sola vez de la interfaz"""
+    
+    model_name: str                 # Nombre del archivo (ej: yolov9s.pt)
+    data_path: str                  # Ruta al data.yaml
+    output_dir: str                 # Directorio de salida
+    epochs: int
+    imgsz: int
+    batch: int                      # -1 = AutoBatch
+    device: Optional[str] = None    # None = autodetectar (GPU si hay CUDA)
+    amp: bool = True                # Precisión mixta (FP16) en GPU
+    compile_enabled: bool = True    # torch.compile (inductor)
+    live_log: bool = True           # Reenviar la salida del CLI al log
+    cache_ram: bool = False         # Dataset decodificado en RAM (opcional: puede agotar la memoria)
+    
+    def train_args(self):
+        """Argumentos de ultralytics compartidos por el CLI y el método Python"""
+        args = {
+            "data": self.data_path,
+            "epochs": self.epochs,
+            "imgsz": self.imgsz,
+            "batch": self.batch,
+            "plots": True,
+            "amp": self.amp,
+            # En RAM evita decodificar los JPEG en cada época, pero un dataset grande puede
+            # dejar sin memoria al proceso de entrenamiento: solo si se pide
+            "cache": "ram" if self.cache_ram else False,
+            "workers": max(2, (os.cpu_count() or 4) - 1),  # Deja un núcleo libre para la UI
+        }
+        
+        # Sin device explícito ultralytics usa CUDA si está disponible
+        if self.device is not None:
+            args["device"] = self.device
+        
+        if self.compile_enabled:
+            args["compile"] = True
+            args["deterministic"] = False  # Permite a inductor fusionar sin restricciones
+        
+        return args
+    
+    def run_name(self):
+        """Nombre estable del run: la misma configuración apunta a la misma carpeta"""
+        key = f"{self.model_name}|{self.data_path}|{self.epochs}|{self.imgsz}|{self.batch}"
+        return f"train_python_{hashlib.blake2b(key.encode(), digest_size=6).hexdigest()}"
 
 class TrainingWorker(QThread):
     """Worker thread para entrenamiento YOLO"""
     
-    progress_update = pyqtSignal(str)
+    progress_update = pyqtSignal(str)   # Todas las líneas (log)
+    status_update = pyqtSignal(str)     # Resumen limitado para la etiqueta de estado
     training_completed = pyqtSignal(bool, str)
     
-    def __init__(self, model_name, epochs, imgsz, batch, data_path, output_dir):
+    def __init__(self, train_config):
         super().__init__()
-        self.model_name = model_name  # Nombre del archivo (ej: yolov9s.pt)
-        self.epochs = epochs
-        self.imgsz = imgsz
-        self.batch = batch
-        self.data_path = data_path    # Ruta al data.yaml
-        self.output_dir = output_dir  # Directorio de salida
-        self.should_stop = False
+        self.cfg = train_config
+        # Directorio de trabajo del entrenamiento (content): rutas relativas del CLI y runs/
+        self._base_dir = Path(train_config.data_path).parent.parent  # My-First-Project-3 -> content
+        self._compile_error = False
         self.process = None
+        self._last_status_time = 0.0
+        # Lote de líneas del CLI pendientes (solo se usa desde el hilo del worker)
+        self._pending = []
+        self._pending_since = 0.0
+    
+    def _disable_compile(self):
+        """Continuar sin torch.compile tras un fallo de compilación"""
+        self._report("⚠️ torch.compile falló, reintentando sin compilación...")
+        self.cfg = replace(self.cfg, compile_enabled=False)
+    
+    def _report(self, message, throttle=False):
+        """
+        Enviar un mensaje al log y, como máximo una vez por intervalo, al estado.
+        Las líneas con throttle se agrupan y se emiten en lotes al log.
+        """
+        now = time.monotonic()
+        
+        if throttle:
+            self._pending.append(message)
+            if (len(self._pending) >= LOG_BATCH_MAX_LINES
+                    or now - self._pending_since >= LOG_BATCH_INTERVAL_S):
+                self._flush_pending()
+        else:
+            self._flush_pending()
+            self.progress_update.emit(message)
+        
+        self._update_status(message, throttle)
+    
+    def _update_status(self, message, throttle=False):
+        """Actualizar la etiqueta de estado (con throttle, como máximo una vez por intervalo)"""
+        now = time.monotonic()
+        if not throttle or now - self._last_status_time >= STATUS_UPDATE_INTERVAL_S:
+            self._last_status_time = now
+            self.status_update.emit(message)
+    
+    def _flush_pending(self):
+        """Emitir al log las líneas acumuladas como un único mensaje"""
+        if self._pending:
+            self.progress_update.emit('\n'.join(self._pending))
+            self._pending.clear()
+        self._pending_since = time.monotonic()
     
     def stop(self):
         """Detener entrenamiento"""
-        self.should_stop = True
+        self.requestInterruption()  # Bandera thread-safe consultada por ambos métodos
         if self.process:
             self.process.terminate()
         
     def run(self):
         """Ejecutar entrenamiento con múltiples métodos de fallback"""
         try:
-            # Cambiar al directorio correcto para rutas relativas
-            base_dir = Path(self.data_path).parent.parent  # My-First-Project-3 -> content
-            os.chdir(str(base_dir))
-            
-            self.progress_update.emit(f"� Cambiando al directorio: {base_dir}")
+            self._report(f"📂 Directorio de trabajo: {self._base_dir}")
+            started_at = time.time()
             
             # Método 1: Intentar con CLI de YOLO (como en Jupyter)
             success = self._try_yolo_cli_method()
             
-            if not success:
+            if not success and self._compile_error and not self.isInterruptionRequested():
+                # Reintentar sin torch.compile antes de cambiar de método
+                self._disable_compile()
+                success = self._try_yolo_cli_method()
+            
+            if not success and not self.isInterruptionRequested():
                 # Método 2: Fallback con ultralytics Python
-                self.progress_update.emit("🔄 CLI falló, intentando método Python...")
+                self._report("🔄 CLI falló, intentando método Python...")
                 success = self._try_python_method()
             
             if success:
-                self.progress_update.emit("✅ Entrenamiento completado exitosamente!")
-                
-                # Buscar el modelo entrenado
-                possible_paths = [
-                    Path(self.output_dir) / f"train_{datetime.now().strftime('%Y%m%d_%H%M%S')}" / "weights" / "best.pt",
-                    Path("runs") / "detect" / "train" / "weights" / "best.pt",
-                    Path("runs") / "detect" / "train2" / "weights" / "best.pt",
-                    Path("runs") / "detect" / "train3" / "weights" / "best.pt"
-                ]
-                
-                model_path = None
-                for path in possible_paths:
-                    if path.exists():
-                        model_path = str(path)
-                        break
+                self._report("✅ Entrenamiento completado exitosamente!")
                 
+                model_path = self._find_trained_model(started_at)
                 self.training_completed.emit(True, model_path or "Entrenamiento completado")
+            elif self.isInterruptionRequested():
+                self._report("⏹️ Entrenamiento detenido por el usuario")
+                self.training_completed.emit(False, "Entrenamiento detenido por el usuario")
             else:
-                self.progress_update.emit("❌ Todos los métodos de entrenamiento fallaron")
+                self._report("❌ Todos los métodos de entrenamiento fallaron")
                 self.training_completed.emit(False, "Error: No se pudo completar el entrenamiento")
                 
         except Exception as e:
             error_msg = f"Error durante entrenamiento: {str(e)}"
-            self.progress_update.emit(f"❌ {error_msg}")
+            self._report(f"❌ {error_msg}")
             self.training_completed.emit(False, error_msg)
     
+    def _stream_cli_output(self):
+        """Reenviar la salida del CLI al log; False si se pidió detener el entrenamiento"""
+        # Procesar salida en tiempo real: read1 devuelve lo disponible en un solo bloque
+        tail = b''
+        for chunk in self._read_cli_chunks():
+            if self.isInterruptionRequested():
+                self.process.terminate()
+                return False
+            
+            if chunk is None:
+                self._flush_pending()  # Sin datos en este intervalo: vaciar el lote
+                continue
+            if not chunk:
+                break  # EOF: el proceso cerró su salida
+            
+            lines = (tail + chunk).split(b'\n')
+            tail = lines.pop()
+            for raw_line in lines:
+                # Las barras de progreso se redibujan con '\r': solo cuenta el último estado
+                self._handle_cli_line(raw_line.rstrip(b'\r').rsplit(b'\r', 1)[-1])
+            
+            # Redibujados ya completos de la línea en curso: solo actualizan el estado
+            if b'\r' in tail:
+                redraws, tail = tail.rsplit(b'\r', 1)
+                self._handle_cli_redraw(redraws.rsplit(b'\r', 1)[-1])
+        
+        if tail:
+            self._handle_cli_line(tail)
+        self._flush_pending()
+        return True
+    
+    def _wait_cli_silently(self):
+        """Esperar al CLI sin mostrar su salida; False si se pidió detener el entrenamiento"""
+        # Solo se conserva el final de stderr (sin decodificar ni partir en líneas) para
+        # poder detectar un fallo de torch.compile y reintentar sin él
+        tail = b''
+        for chunk in self._read_cli_chunks(self.process.stderr):
+            if self.isInterruptionRequested():
+                self.process.terminate()
+                return False
+            if chunk is None:
+                continue
+            if not chunk:
+                break  # EOF: el proceso cerró su salida
+            tail = (tail + chunk)[-SILENT_STDERR_TAIL_BYTES:]
+        
+        if self.cfg.compile_enabled and _is_compile_error(tail.decode('utf-8', errors='replace')):
+            self._compile_error = True
+        return True
+    
+    def _find_trained_model(self, started_at):
+        """Buscar el best.pt más reciente escrito por este entrenamiento"""
+        # CLI: content/runs/detect/trainN ; método Python: <output_dir>/train_python_*
+        patterns = [
+            (self._base_dir / "runs" / "detect", "train*/weights/best.pt"),
+            (Path(self.cfg.output_dir), "train*/weights/best.pt"),
+        ]
+        
+        newest_path, newest_mtime = None, started_at
+        for root, pattern in patterns:
+            if not root.exists():
+                continue
+            for path in root.glob(pattern):
+                mtime = path.stat().st_mtime
+                if mtime >= newest_mtime:
+                    newest_path, newest_mtime = path, mtime
+        
+        return str(newest_path) if newest_path else None
+    
     def _try_yolo_cli_method(self):
         """Intentar entrenamiento con CLI de YOLO (método preferido)"""
+        # Sin ejecutable 'yolo' en el PATH no tiene sentido lanzar el proceso
+        yolo_cli = shutil.which("yolo")
+        if yolo_cli is None:
+            self._report("⚠️ CLI 'yolo' no encontrado, probando método alternativo...")
+            return False
+        
         try:
             # Construir comando exactamente como en Jupyter
             # !yolo task=detect mode=train model=yolov9s.pt data=My-First-Project-3/data.yaml epochs=125 imgsz=640 plots=True
-            cmd = [
-                "yolo", "task=detect", "mode=train", 
-                f"model={self.model_name}",
-                f"data=My-First-Project-3/data.yaml",
-                f"epochs={self.epochs}",
-                f"imgsz={self.imgsz}",
-                f"batch={self.batch}",
-                "plots=True"
-            ]
-            
-            self.progress_update.emit(f"🚀 Ejecutando: {' '.join(cmd)}")
-            
-            # Ejecutar comando
+            cmd = [yolo_cli, "task=detect", "mode=train", f"model={self.cfg.model_name}"]
+            cmd.extend(f"{key}={value}" for key, value in self.cfg.train_args().items())
+            
+            self._report(f"🚀 Ejecutando: {' '.join(cmd)}")
+            
+            return self._run_training_process(cmd)
+                
+        except FileNotFoundError:
+            self._report("⚠️ CLI 'yolo' no encontrado, probando método alternativo...")
+            return False
+        except Exception as e:
+            self._report(f"⚠️ Error con CLI: {str(e)}")
+            return False
+    
+    def _run_training_process(self, cmd):
+        """Ejecutar un proceso de entrenamiento y seguir su salida; True si terminó bien"""
+        self._compile_error = False
+        
+        if self.cfg.live_log:
+            # Ejecutar comando (salida en binario: se decodifica por líneas completas)
             self.process = subprocess.Popen(
                 cmd,
                 stdout=subprocess.PIPE,
                 stderr=subprocess.STDOUT,
-                universal_newlines=True,
-                bufsize=1
+                bufsize=CLI_PIPE_BUFFER_SIZE,
+                cwd=str(self._base_dir)  # Solo afecta al proceso hijo (os.chdir es global)
             )
+            finished = self._stream_cli_output()
+        else:
+            # Sin log en vivo stdout se descarta en el kernel; stderr se lee solo para
+            # conservar su final (ahí aparecen los errores de torch.compile)
+            self.process = subprocess.Popen(
+                cmd,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.PIPE,
+                bufsize=CLI_PIPE_BUFFER_SIZE,
+                cwd=str(self._base_dir)
+            )
+            self._report("🔇 Log en vivo desactivado: esperando a que termine el entrenamiento...")
+            finished = self._wait_cli_silently()
+        
+        if not finished:
+            return False  # Detenido por el usuario
+        
+        # Verificar código de salida
+        return_code = self.process.wait()
+        if return_code == 0:
+            return True
+        else:
+            self._report(f"❌ El proceso de entrenamiento terminó con código {return_code}")
+            return False
+    
+    def _read_cli_chunks(self, stream=None):
+        """
+        Generar bloques de salida del CLI sin bloquear más de CLI_POLL_INTERVAL_S.
+        Produce None cuando no llegaron datos en el intervalo y b'' al llegar a EOF.
+        Lee stdout del proceso salvo que se indique otra tubería.
+        """
+        stdout = stream if stream is not None else self.process.stdout
+        
+        if os.name == 'nt':
+            # En Windows los selectores no admiten tuberías: leer en un hilo auxiliar
+            import queue
+            import threading
+            
+            chunks = queue.Queue()
+            
+            def reader():
+                while True:
+                    chunk = stdout.read1(CLI_PIPE_BUFFER_SIZE)
+                    chunks.put(chunk)
+                    if not chunk:
+                        break
             
-            # Procesar salida en tiempo real
+            threading.Thread(target=reader, daemon=True).start()
             while True:
-                if self.should_stop:
-                    self.process.terminate()
-                    return False
-                
-                output = self.process.stdout.readline()
-                if output == '' and self.process.poll() is not None:
-                    break
-                
-                if output:
-                    line = output.strip()
-                    if line:
-                        self.progress_update.emit(f"📊 {line}")
-            
-            # Verificar código de salida
-            return_code = self.process.poll()
-            if return_code == 0:
-                return True
-            else:
-                self.progress_update.emit(f"❌ CLI terminó con código {return_code}")
-                return False
-                
-        except FileNotFoundError:
-            self.progress_update.emit("⚠️ CLI 'yolo' no encontrado, probando método alternativo...")
-            return False
-        except Exception as e:
-            self.progress_update.emit(f"⚠️ Error con CLI: {str(e)}")
-            return False
+                try:
+                    chunk = chunks.get(timeout=CLI_POLL_INTERVAL_S)
+                except queue.Empty:
+                    yield None
+                    continue
+                yield chunk
+                if not chunk:
+                    return
+        else:
+            import selectors
+            
+            with selectors.DefaultSelector() as selector:
+                selector.register(stdout, selectors.EVENT_READ)
+                while True:
+                    if not selector.select(timeout=CLI_POLL_INTERVAL_S):
+                        yield None
+                        continue
+                    chunk = stdout.read1(CLI_PIPE_BUFFER_SIZE)
+                    yield chunk
+                    if not chunk:
+                        return
+    
+    def _handle_cli_redraw(self, raw_line):
+        """Mostrar en el estado (sin pasar al log) un redibujado intermedio de la barra"""
+        line = raw_line.decode('utf-8', errors='replace').strip()
+        if line:
+            self._update_status(f"📊 {line}", throttle=True)
+    
+    def _handle_cli_line(self, raw_line):
+        """Decodificar y reportar una línea de salida del CLI"""
+        line = raw_line.decode('utf-8', errors='replace').strip()
+        if line:
+            if self.cfg.compile_enabled and _is_compile_error(line):
+                self._compile_error = True
+            self._report(f"📊 {line}", throttle=True)
+    
+    def _python_command(self):
+        """Comando para entrenar con ultralytics en un proceso hijo (_train_worker.py)"""
+        # Ruta absoluta si el modelo está en content; si no, ultralytics lo descarga
+        local_model = self._base_dir / self.cfg.model_name
+        model = str(local_model) if local_model.exists() else self.cfg.model_name
+        
+        train_args = dict(self.cfg.train_args(), project=self.cfg.output_dir,
+                          name=self.cfg.run_name())
+        cmd = [sys.executable, "-u", str(TRAIN_WORKER_SCRIPT), model, json.dumps(train_args)]
+        
+        # Un entrenamiento interrumpido con la misma configuración se reanuda
+        last_checkpoint = Path(self.cfg.output_dir) / self.cfg.run_name() / "weights" / "last.pt"
+        if last_checkpoint.exists():
+            cmd.extend(["--resume", str(last_checkpoint)])
+        
+        return cmd
     
     def _try_python_method(self):
-        """Método fallback usando ultralytics directamente"""
+        """Método fallback usando ultralytics en un proceso aparte (torch no entra en la GUI)"""
         try:
-            from ultralytics import YOLO
-            
-            self.progress_update.emit("🐍 Usando método Python directo...")
-            
-            # Cargar modelo
-            model = YOLO(self.model_name)
-            
-            # Entrenar con los mismos parámetros
-            results = model.train(
-                data="My-First-Project-3/data.yaml",
-                epochs=self.epochs,
-                imgsz=self.imgsz,
-                batch=self.batch,
-                plots=True,
-                project=self.output_dir,
-                name=f"train_python_{int(time.time())}"
-            )
+            self._report("🐍 Usando método Python (proceso aparte)...")
             
-            return True
+            success = self._run_training_process(self._python_command())
+            
+            if not success and self._compile_error and not self.isInterruptionRequested():
+                self._disable_compile()
+                success = self._run_training_process(self._python_command())
+            
+            return success
             
-        except ImportError:
-            self.progress_update.emit("❌ ultralytics no está instalado")
-            return False
         except Exception as e:
-            self.progress_update.emit(f"❌ Error método Python: {str(e)}")
+            self._report(f"❌ Error método Python: {str(e)}")
             return False
 
+def count_images(directory):
+    """Contar las imágenes de un directorio (sin subdirectorios) en una sola pasada con os.scandir"""
+    count = 0
+    with os.scandir(directory) as entries:
+        for entry in entries:
+            # Solo el sufijo pasa a minúsculas; is_file() queda para los que coinciden
+            if entry.name[entry.name.rfind('.'):].lower() in DATASET_IMAGE_EXTENSIONS and entry.is_file():
+                count += 1
+    return count
+
+class DatasetScanWorker(QThread):
+    """Worker para leer data.yaml y contar imágenes sin bloquear la interfaz"""
+    
+    info_ready = pyqtSignal(str)
+    
+    def __init__(self, dataset_dir, cache_path=None):
+        super().__init__()
+        self.dataset_dir = Path(dataset_dir)
+        self.cache_path = Path(cache_path) if cache_path else None
+    
+    def _dataset_mtimes(self, data_yaml_path, train_dir, valid_dir):
+        """Marcas de modificación de data.yaml y de los directorios de imágenes (None si falta)"""
+        # Lista y no el máximo: un cambio en un componente que no es el más reciente también cuenta
+        mtimes = []
+        for path in (data_yaml_path, train_dir, valid_dir):
+            try:
+                mtimes.append(path.stat().st_mtime_ns)
+            except OSError:
+                mtimes.append(None)
+        return mtimes
+    
+    def _load_cache(self):
+        """Leer la caché del último escaneo ({} si no existe o es de otro dataset)"""
+        if self.cache_path is None:
+            return {}
+        try:
+            with open(self.cache_path, 'r', encoding='utf-8') as f:
+                cache = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        return cache if cache.get('dataset') == str(self.dataset_dir) else {}
+    
+    def _save_cache(self, mtimes, info_text, counts):
+        """Guardar el resultado del escaneo (escritura atómica)"""
+        if self.cache_path is None:
+            return
+        try:
+            self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.cache_path.with_name(self.cache_path.name + '.tmp')
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({'dataset': str(self.dataset_dir), 'mtimes': mtimes,
+                           'info_text': info_text, 'counts': counts}, f)
+            os.replace(tmp_path, self.cache_path)
+        except OSError:
+            pass  # La caché es opcional
+    
+    def _count_with_cache(self, directory, cached_counts, counts):
+        """Contar imágenes reutilizando el conteo previo si el directorio no cambió"""
+        key = str(directory)
+        dir_mtime = directory.stat().st_mtime_ns
+        cached = cached_counts.get(key)
+        count = cached[1] if cached and cached[0] == dir_mtime else count_images(directory)
+        counts[key] = [dir_mtime, count]
+        return count
+    
+    def run(self):
+        try:
+            data_yaml_path = self.dataset_dir / "data.yaml"
+            
+            if not data_yaml_path.exists():
+                self.info_ready.emit("⚠️ Dataset no encontrado\nVerificar configuración")
+                return
+            
+            # Verificar directorios del dataset
+            train_dir = self.dataset_dir / 'train' / 'images'
+            valid_dir = self.dataset_dir / 'valid' / 'images'
+            
+            # Si nada cambió desde el último escaneo, reutilizar el resultado
+            mtimes = self._dataset_mtimes(data_yaml_path, train_dir, valid_dir)
+            cache = self._load_cache()
+            if cache.get('mtimes') == mtimes and 'info_text' in cache:
+                self.info_ready.emit(cache['info_text'])
+                return
+            
+            # Leer información del data.yaml
+            import yaml
+            # Parser en C (libyaml) si PyYAML fue compilado con él
+            loader = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+            with open(data_yaml_path, 'r') as f:
+                data = yaml.load(f, Loader=loader)
+            
+            nc = data.get('nc', 0)
+            names = data.get('names', [])
+            
+            info_text = f"📊 Clases: {nc}\n"
+            if names:
+                info_text += f"🏷️ Nombres: {', '.join(names[:3])}{'...' if len(names) > 3 else ''}\n"
+            
+            # Solo se vuelven a contar los directorios que cambiaron
+            cached_counts = cache.get('counts', {})
+            counts = {}
+            
+            if train_dir.exists():
+                train_count = self._count_with_cache(train_dir, cached_counts, counts)
+                info_text += f"🏋️ Entrenamiento: {train_count} imágenes\n"
+            
+            if valid_dir.exists():
+                valid_count = self._count_with_cache(valid_dir, cached_counts, counts)
+                info_text += f"✅ Validación: {valid_count} imágenes"
+            
+            self._save_cache(mtimes, info_text, counts)
+            self.info_ready.emit(info_text)
+        except Exception as e:
+            self.info_ready.emit(f"❌ Error al cargar dataset:\n{str(e)[:50]}...")
+
+class StridedSpinBox(QSpinBox):
+    """SpinBox que ajusta el valor escrito al múltiplo inferior de singleStep"""
+    
+    def valueFromText(self, text):
+        value = super().valueFromText(text)
+        step = self.singleStep()
+        return max(self.minimum(), min(self.maximum(), (value // step) * step))
+
 class TrainTab(QWidget):
     """Pestaña para entrenamiento de modelos"""
     
@@ -175,6 +566,9 @@ class TrainTab(QWidget):
     def __init__(self):
         super().__init__()
         self.training_worker = None
+        self.dataset_scan_worker = None
+        self._title_font = None
+        self._history_cache = (None, None)  # (st_mtime_ns de content/runs, nombres ordenados)
         
         # Configuración por defecto (sin dependencia del config)
         self.available_models = ['yolov9n.pt', 'yolov9s.pt', 'yolov9m.pt', 'yolov9l.pt']
@@ -209,6 +603,18 @@ class TrainTab(QWidget):
         # PROPORCIONES - Adaptadas para pantallas pequeñas
         splitter.setSizes([320, 780])
     
+    def create_title_label(self, text):
+        """Crear un título de sección con la fuente y el estilo compartidos"""
+        if self._title_font is None:
+            self._title_font = QFont()
+            self._title_font.setPointSize(12)  # Tamaño reducido para pantallas pequeñas
+            self._title_font.setBold(True)
+        
+        title = QLabel(text)
+        title.setFont(self._title_font)
+        title.setStyleSheet(TITLE_QSS)
+        return title
+    
     def create_config_panel(self):
         """
         PANEL DE CONFIGURACIÓN - Controles para configurar entrenamiento
@@ -222,13 +628,7 @@ class TrainTab(QWidget):
         layout.setSpacing(8)  # Espaciado reducido
         
         # TÍTULO DE LA SECCIÓN
-        title = QLabel("⚙️ Configuración de Entrenamiento")
-        title_font = QFont()
-        title_font.setPointSize(12)  # Tamaño reducido para pantallas pequeñas
-        title_font.setBold(True)
-        title.setFont(title_font)
-        title.setStyleSheet("color: #000000; background-color: #e8f5e8; padding: 8px; border-radius: 4px; font-weight: bold;")  # EDITAR COLOR TÍTULO - FIJO
-        layout.addWidget(title)
+        layout.addWidget(self.create_title_label("⚙️ Configuración de Entrenamiento"))
         
         # GRUPO: SELECCIÓN DE MODELO BASE
         model_group = QGroupBox("Selección de Modelo")
@@ -245,7 +645,7 @@ class TrainTab(QWidget):
         
         # GRUPO: PARÁMETROS DE ENTRENAMIENTO
         params_group = QGroupBox("Parámetros de Entrenamiento")
-        params_group.setMaximumHeight(150)  # Altura controlada para pantallas pequeñas
+        params_group.setMaximumHeight(300)  # Altura controlada para pantallas pequeñas
         params_layout = QFormLayout(params_group)
         params_layout.setSpacing(5)
         
@@ -256,8 +656,8 @@ class TrainTab(QWidget):
         self.epochs_spin.setMinimumHeight(25)
         params_layout.addRow("Épocas:", self.epochs_spin)
         
-        # TAMAÑO DE IMAGEN - Resolución para entrenamiento
-        self.imgsz_spin = QSpinBox()
+        # TAMAÑO DE IMAGEN - Resolución para entrenamiento (múltiplos de 32, como YOLO)
+        self.imgsz_spin = StridedSpinBox()
         self.imgsz_spin.setRange(320, 1280)
         self.imgsz_spin.setSingleStep(32)
         self.imgsz_spin.setValue(self.default_imgsz)
@@ -271,6 +671,37 @@ class TrainTab(QWidget):
         self.batch_spin.setMinimumHeight(25)
         params_layout.addRow("Batch size:", self.batch_spin)
         
+        # AUTO BATCH - batch=-1: ultralytics elige el lote según la VRAM libre
+        self.auto_batch_check = QCheckBox("Auto batch")
+        self.auto_batch_check.toggled.connect(lambda checked: self.batch_spin.setEnabled(not checked))
+        params_layout.addRow("", self.auto_batch_check)
+        
+        # DISPOSITIVO - auto usa la GPU (CUDA) cuando está disponible
+        self.device_combo = QComboBox()
+        self.device_combo.addItems(list(DEVICE_OPTIONS))
+        self.device_combo.setMinimumHeight(25)
+        params_layout.addRow("Dispositivo:", self.device_combo)
+        
+        # PRECISIÓN MIXTA - Kernels FP16 en GPU (menos memoria, más rápido)
+        self.amp_check = QCheckBox("Mixed precision (AMP)")
+        self.amp_check.setChecked(True)
+        params_layout.addRow("", self.amp_check)
+        
+        # TORCH.COMPILE - Compila el modelo con inductor (se desactiva solo si falla)
+        self.compile_check = QCheckBox("torch.compile")
+        self.compile_check.setChecked(True)
+        params_layout.addRow("", self.compile_check)
+        
+        # CACHÉ EN RAM - Imágenes decodificadas en memoria (más rápido; requiere RAM suficiente)
+        self.cache_ram_check = QCheckBox("Cachear imágenes en RAM")
+        self.cache_ram_check.setChecked(False)
+        params_layout.addRow("", self.cache_ram_check)
+        
+        # LOG EN VIVO - Desactivado, stdout se descarta y de stderr solo se guarda el final
+        self.live_log_check = QCheckBox("Mostrar log en vivo")
+        self.live_log_check.setChecked(True)
+        params_layout.addRow("", self.live_log_check)
+        
         layout.addWidget(params_group)
         
         # GRUPO: INFORMACIÓN DEL DATASET
@@ -292,7 +723,9 @@ class TrainTab(QWidget):
             }
         """)  # EDITAR ESTILO DE INFORMACIÓN DEL DATASET - COLORES FIJOS
         self.dataset_info.setWordWrap(True)
-        self.update_dataset_info()
+        self.dataset_info.setText("⏳ Analizando dataset...")
+        # Lanzar el escaneo cuando arranque el bucle de eventos, tras el primer pintado
+        QTimer.singleShot(0, self.update_dataset_info)
         dataset_layout.addWidget(self.dataset_info)
         
         layout.addWidget(dataset_group)
@@ -371,18 +804,13 @@ class TrainTab(QWidget):
         layout.setSpacing(8)
         
         # TÍTULO DE LA SECCIÓN
-        title = QLabel("📊 Progreso del Entrenamiento")
-        title_font = QFont()
-        title_font.setPointSize(12)  # Tamaño reducido para pantallas pequeñas
-        title_font.setBold(True)
-        title.setFont(title_font)
-        title.setStyleSheet("color: #000000; background-color: #e8f5e8; padding: 8px; border-radius: 4px; font-weight: bold;")  # EDITAR COLOR TÍTULO - FIJO
-        layout.addWidget(title)
+        layout.addWidget(self.create_title_label("📊 Progreso del Entrenamiento"))
         
         # BARRA DE PROGRESO PRINCIPAL
         self.progress_bar = QProgressBar()
         self.progress_bar.setMinimumHeight(25)  # Altura visible en pantallas pequeñas
-        self.progress_bar.setVisible(False)
+        self.progress_bar.setTextVisible(False)
+        self.set_progress_busy(False)  # Siempre visible: evita re-layout al mostrar/ocultar
         self.progress_bar.setStyleSheet("""
             QProgressBar {
                 border: 2px solid #cccccc;
@@ -416,7 +844,12 @@ class TrainTab(QWidget):
         
         self.log_text = QTextEdit()
         self.log_text.setReadOnly(True)
-        self.log_text.setFont(QFont("Consolas", 8))  # Fuente más pequeña
+        # Fuente monoespaciada del sistema (evita buscar "Consolas" fuera de Windows)
+        log_font = QFontDatabase.systemFont(QFontDatabase.SystemFont.FixedFont)
+        log_font.setPointSize(8)  # Fuente más pequeña
+        self.log_text.setFont(log_font)
+        self.log_text.setLineWrapMode(QTextEdit.LineWrapMode.NoWrap)  # Sin re-ajuste de líneas al redimensionar
+        self.log_text.document().setMaximumBlockCount(LOG_MAX_BLOCKS)  # Limitar memoria
         self.log_text.setStyleSheet("""
             QTextEdit {
                 background-color: #ffffff;
@@ -427,6 +860,13 @@ class TrainTab(QWidget):
         """)  # EDITAR ESTILO LOG - COLORES FIJOS
         log_layout.addWidget(self.log_text)
         
+        # Los mensajes se acumulan y se vuelcan en bloque para evitar un re-layout por línea
+        self._log_buf = []
+        self._log_timer = QTimer(self)
+        self._log_timer.setSingleShot(True)
+        self._log_timer.setInterval(LOG_FLUSH_INTERVAL_MS)
+        self._log_timer.timeout.connect(self._flush_log)
+        
         layout.addWidget(log_group)
         
         # ENTRENAMIENTOS ANTERIORES - Historial de entrenamientos
@@ -464,63 +904,49 @@ class TrainTab(QWidget):
         return panel
     
     def update_dataset_info(self):
-        """Actualizar información del dataset"""
-        try:
-            # Usar rutas relativas
-            base_dir = Path(__file__).parent.parent.parent  # UI/gui -> UI -> Segmentacion
-            data_yaml_path = base_dir / "content" / "My-First-Project-3" / "data.yaml"
-            
-            if data_yaml_path.exists():
-                # Leer información del data.yaml
-                import yaml
-                with open(data_yaml_path, 'r') as f:
-                    data = yaml.safe_load(f)
-                
-                nc = data.get('nc', 0)
-                names = data.get('names', [])
-                
-                info_text = f"📊 Clases: {nc}\n"
-                if names:
-                    info_text += f"🏷️ Nombres: {', '.join(names[:3])}{'...' if len(names) > 3 else ''}\n"
-                
-                # Verificar directorios del dataset
-                dataset_dir = base_dir / "content" / "My-First-Project-3"
-                train_dir = dataset_dir / 'train' / 'images'
-                valid_dir = dataset_dir / 'valid' / 'images'
-                
-                if train_dir.exists():
-                    train_count = len(list(train_dir.glob('*.jpg')) + list(train_dir.glob('*.jpeg')))
-                    info_text += f"🏋️ Entrenamiento: {train_count} imágenes\n"
-                
-                if valid_dir.exists():
-                    valid_count = len(list(valid_dir.glob('*.jpg')) + list(valid_dir.glob('*.jpeg')))
-                    info_text += f"✅ Validación: {valid_count} imágenes"
-                
-                self.dataset_info.setText(info_text)
-            else:
-                self.dataset_info.setText("⚠️ Dataset no encontrado\nVerificar configuración")
-        except Exception as e:
-            self.dataset_info.setText(f"❌ Error al cargar dataset:\n{str(e)[:50]}...")
+        """Actualizar información del dataset (escaneo en segundo plano)"""
+        if self.dataset_scan_worker is not None and self.dataset_scan_worker.isRunning():
+            return
+        
+        self.dataset_info.setText("⏳ Analizando dataset...")
+        
+        # Fuera de los directorios de runs: escribirla cambiaría su mtime e invalidaría
+        # las cachés de historial que dependen de él
+        cache_path = config.CACHE_DIR / "dataset_cache.json"
+        
+        self.dataset_scan_worker = DatasetScanWorker(config.DATASET_DIR, cache_path)
+        self.dataset_scan_worker.info_ready.connect(self.dataset_info.setText)
+        self.dataset_scan_worker.start()
     
     def load_existing_models(self):
         """Cargar modelos existentes"""
-        self.history_combo.clear()
+        runs_dir = config.TRAIN_RUNS_DIR
         
-        # Usar rutas relativas
-        base_dir = Path(__file__).parent.parent.parent  # UI/gui -> UI -> Segmentacion
-        runs_dir = base_dir / "content" / "runs"
+        try:
+            runs_mtime = runs_dir.stat().st_mtime_ns
+        except OSError:
+            runs_mtime = None
         
-        if runs_dir.exists():
-            train_dirs = []
-            for item in runs_dir.iterdir():
-                if item.is_dir() and item.name.startswith("train"):
-                    train_dirs.append(item)
-            
-            # Ordenar por fecha de modificación (más recientes primero)
-            train_dirs = sorted(train_dirs, key=lambda x: x.stat().st_mtime, reverse=True)
-            
-            for run_dir in train_dirs:
-                self.history_combo.addItem(run_dir.name)
+        # Si el directorio no cambió, reutilizar el listado anterior
+        if runs_mtime is not None and self._history_cache[0] == runs_mtime:
+            run_names = self._history_cache[1]
+        else:
+            run_names = []
+            if runs_mtime is not None:
+                with os.scandir(runs_dir) as entries:
+                    train_entries = [entry for entry in entries
+                                     if entry.name.startswith("train") and entry.is_dir()]
+                
+                # Ordenar por fecha de modificación (más recientes primero)
+                train_entries.sort(key=lambda entry: entry.stat().st_mtime, reverse=True)
+                run_names = [entry.name for entry in train_entries]
+            self._history_cache = (runs_mtime, run_names)
+        
+        # Cargar la lista completa sin disparar currentTextChanged por cada elemento
+        self.history_combo.blockSignals(True)
+        self.history_combo.clear()
+        self.history_combo.addItems(run_names)
+        self.history_combo.blockSignals(False)
     
     def start_training(self):
         """Iniciar entrenamiento"""
@@ -529,16 +955,11 @@ class TrainTab(QWidget):
             return
         
         try:
-            # Obtener parámetros
             model_name = self.model_combo.currentText()
-            epochs = self.epochs_spin.value()
-            imgsz = self.imgsz_spin.value()
-            batch = self.batch_spin.value()
             
-            # Configurar rutas usando rutas relativas
-            base_dir = Path(__file__).parent.parent.parent  # UI/gui -> UI -> Segmentacion
-            data_yaml_path = base_dir / "content" / "My-First-Project-3" / "data.yaml"
-            output_dir = base_dir / "content" / "runs"
+            # Rutas resueltas una sola vez en la configuración global
+            data_yaml_path = config.DATA_YAML
+            output_dir = config.TRAIN_RUNS_DIR
             
             # Verificar que el data.yaml existe
             if not data_yaml_path.exists():
@@ -546,7 +967,7 @@ class TrainTab(QWidget):
                 return
             
             # Verificar que el modelo existe en content
-            model_path = base_dir / "content" / model_name
+            model_path = config.CONTENT_DIR / model_name
             if not model_path.exists():
                 QMessageBox.critical(self, "Error", f"Modelo no encontrado en:\n{model_path}\n\nAsegúrate de tener {model_name} en la carpeta content/")
                 return
@@ -554,14 +975,30 @@ class TrainTab(QWidget):
             # Crear directorio de salida
             output_dir.mkdir(parents=True, exist_ok=True)
             
+            # Leer los parámetros de la interfaz una sola vez
+            train_config = TrainConfig(
+                model_name=model_name,
+                data_path=str(data_yaml_path),
+                output_dir=str(output_dir),
+                epochs=self.epochs_spin.value(),
+                imgsz=self.imgsz_spin.value(),
+                batch=-1 if self.auto_batch_check.isChecked() else self.batch_spin.value(),
+                device=DEVICE_OPTIONS[self.device_combo.currentText()],
+                amp=self.amp_check.isChecked(),
+                compile_enabled=self.compile_check.isChecked(),
+                live_log=self.live_log_check.isChecked(),
+                cache_ram=self.cache_ram_check.isChecked(),
+            )
+            
             # Mostrar configuración al usuario antes de entrenar
             config_msg = f"""🎯 Configuración de Entrenamiento:
             
 📁 Modelo: {model_name}
 📊 Dataset: {data_yaml_path.name}
-⚡ Épocas: {epochs}
-🖼️ Tamaño imagen: {imgsz}
-📦 Batch size: {batch}
+⚡ Épocas: {train_config.epochs}
+🖼️ Tamaño imagen: {train_config.imgsz}
+📦 Batch size: {'Auto' if train_config.batch == -1 else train_config.batch}
+🖥️ Dispositivo: {self.device_combo.currentText()}
 💾 Salida: {output_dir}
 
 ¿Continuar con el entrenamiento?"""
@@ -573,17 +1010,18 @@ class TrainTab(QWidget):
                 return
             
             # Crear worker thread con los parámetros correctos
-            self.training_worker = TrainingWorker(
-                model_name, epochs, imgsz, batch, 
-                str(data_yaml_path), str(output_dir)
-            )
-            self.training_worker.progress_update.connect(self.update_progress)
+            self.training_worker = TrainingWorker(train_config)
+            self.training_worker.progress_update.connect(
+                self.update_progress, Qt.ConnectionType.QueuedConnection)
+            self.training_worker.status_update.connect(
+                self.status_label.setText, Qt.ConnectionType.QueuedConnection)
             self.training_worker.training_completed.connect(self.on_training_completed)
             
             # Actualizar UI
             self.start_btn.setEnabled(False)
             self.stop_btn.setEnabled(True)
-            self.progress_bar.setVisible(True)
+            self.set_progress_busy(True)
+            self._log_buf.clear()
             self.log_text.clear()
             self.status_label.setText("🚀 Iniciando entrenamiento...")
             
@@ -606,19 +1044,39 @@ class TrainTab(QWidget):
                 self.training_worker.stop()
                 self.status_label.setText("⏹️ Deteniendo entrenamiento...")
     
+    def set_progress_busy(self, busy):
+        """Barra indeterminada durante el entrenamiento, vacía y deshabilitada en reposo"""
+        # Con rango (0, 0) Qt anima la barra; en reposo se usa un rango normal para no animar
+        self.progress_bar.setRange(0, 0 if busy else 1)
+        self.progress_bar.setValue(0)
+        self.progress_bar.setEnabled(busy)
+    
     def update_progress(self, message):
         """Actualizar progreso"""
-        self.log_text.append(message)
-        self.status_label.setText(message)
+        self._log_buf.append(message)
+        if not self._log_timer.isActive():
+            self._log_timer.start()
+    
+    def _flush_log(self):
+        """Volcar los mensajes acumulados al log en una sola operación"""
+        if not self._log_buf:
+            return
+        
+        self.log_text.setUpdatesEnabled(False)  # Un solo repintado por lote
+        self.log_text.append('\n'.join(self._log_buf))
+        self._log_buf.clear()
         
         # Auto scroll
         cursor = self.log_text.textCursor()
         cursor.movePosition(cursor.MoveOperation.End)
         self.log_text.setTextCursor(cursor)
+        self.log_text.setUpdatesEnabled(True)
     
     def on_training_completed(self, success, model_path):
         """Manejar completación del entrenamiento"""
-        self.progress_bar.setVisible(False)
+        self._log_timer.stop()
+        self._flush_log()
+        self.set_progress_busy(False)
         self.start_btn.setEnabled(True)
         self.stop_btn.setEnabled(False)
         
@@ -635,7 +1093,7 @@ class TrainTab(QWidget):
     
     def reset_ui_after_training(self):
         """Resetear UI después del entrenamiento"""
-        self.progress_bar.setVisible(False)
+        self.set_progress_busy(False)
         self.start_btn.setEnabled(True)
         self.stop_btn.setEnabled(False)
         self.status_label.setText("Listo para entrenar")
@@ -654,13 +1112,12 @@ class TrainTab(QWidget):
             return
         
         try:
-            # Abrir carpeta de resultados usando rutas relativas
-            base_dir = Path(__file__).parent.parent.parent  # UI/gui -> UI -> Segmentacion
-            runs_dir = base_dir / "content" / "runs"
+            # Abrir carpeta de resultados
+            runs_dir = config.TRAIN_RUNS_DIR
             results_path = runs_dir / selection
             
             if results_path.exists():
-                os.startfile(str(results_path))  # Windows
+                QDesktopServices.openUrl(QUrl.fromLocalFile(str(results_path)))
             else:
                 QMessageBox.warning(self, "Advertencia", "Carpeta de resultados no encontrada")
         except Exception as e:
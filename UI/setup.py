@@ -43,7 +43,8 @@ def setup_directories():
     ]
     
     for directory in directories:
-        directory.mkdir(parents=True, exist_ok=True)
+        if not directory.is_dir():
+            directory.mkdir(parents=True, exist_ok=True)
         print(f"  ✓ {directory}")
     
     print("✅ Directorios configurados")
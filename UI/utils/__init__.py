@@ -2,10 +2,29 @@
 Archivo __init__.py para el paquete utils
 """
 
+import importlib
+
+# La configuración es ligera (solo rutas) y se importa siempre; además así "utils.config"
+# sigue siendo la instancia y no el submódulo
 from .config import config, Config
-from .yolo_utils import YOLOProcessor
-from .plant_analyzer import PlantAnalyzer
-from .logger import app_logger
-from .validators import SystemValidator, InputValidator
+
+# Nombre exportado -> submódulo que lo define. Se importan al primer acceso (PEP 562) para que
+# "from utils.config import config" no cargue también OpenCV, NumPy y el logger
+_LAZY_EXPORTS = {
+    'YOLOProcessor': 'yolo_utils',
+    'PlantAnalyzer': 'plant_analyzer',
+    'app_logger': 'logger',
+    'SystemValidator': 'validators',
+    'InputValidator': 'validators'
+}
 
 __all__ = ['config', 'Config', 'YOLOProcessor', 'PlantAnalyzer', 'app_logger', 'SystemValidator', 'InputValidator']
+
+def __getattr__(name):
+    """Importar el submódulo de un nombre exportado la primera vez que se usa"""
+    module_name = _LAZY_EXPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f".{module_name}", __name__), name)
+    globals()[name] = value
+    return value
@@ -9,7 +9,8 @@ class Config:
     """Clase para manejar la configuración de la aplicación"""
     
     def __init__(self):
-        self.BASE_DIR = Path(__file__).parent.parent.parent
+        # Rutas absolutas resueltas una sola vez al importar el módulo
+        self.BASE_DIR = Path(__file__).resolve().parent.parent.parent
         self.CONTENT_DIR = self.BASE_DIR / "content"
         self.UI_DIR = self.BASE_DIR / "UI"
         
@@ -17,7 +18,9 @@ class Config:
         self.DATASET_DIR = self.CONTENT_DIR / "My-First-Project-3"
         self.TEST_IMAGES_DIR = self.CONTENT_DIR / "test_images"
         self.RUNS_DIR = self.CONTENT_DIR / "runs" / "detect"
+        self.TRAIN_RUNS_DIR = self.CONTENT_DIR / "runs"  # Salida de los entrenamientos de la interfaz
         self.MODELS_DIR = self.CONTENT_DIR
+        self.CACHE_DIR = self.CONTENT_DIR / ".cache"  # Cachés de la interfaz (p. ej. info del dataset)
         
         # Archivos de configuración
         self.DATA_YAML = self.DATASET_DIR / "data.yaml"
@@ -43,52 +46,80 @@ class Config:
             "batch": 16,
             "conf": 0.25
         }
+        
+        # Directorios que la aplicación necesita al arrancar
+        self.APP_DIRS = (
+            self.RUNS_DIR,
+            self.CONTENT_DIR / "temp_uploads",
+            self.UI_DIR / "resources" / "icons",
+            self.UI_DIR / "resources" / "styles"
+        )
+        self._dirs_ready = False
+        
+        # Caché del listado de RUNS_DIR: (st_mtime_ns, {prefijo: directorios ordenados})
+        self._runs_cache = None
     
-    def get_latest_train_run(self):
-        """Obtener el directorio del último entrenamiento"""
-        train_dirs = []
-        if self.RUNS_DIR.exists():
-            for item in self.RUNS_DIR.iterdir():
-                if item.is_dir() and item.name.startswith("train"):
-                    train_dirs.append(item)
+    def ensure_dirs(self):
+        """Crear los directorios de APP_DIRS que falten (solo la primera vez que se llama)"""
+        if self._dirs_ready:
+            return
         
-        if train_dirs:
+        for directory in self.APP_DIRS:
+            # En los arranques habituales ya existen: un solo stat y sin mkdir
+            if not directory.is_dir():
+                directory.mkdir(parents=True, exist_ok=True)
+        self._dirs_ready = True
+    
+    def _cached_runs(self, prefix):
+        """Runs de un tipo ("train", "predict" o "all"), más recientes primero; re-escanea solo si RUNS_DIR cambió"""
+        try:
+            mtime = self.RUNS_DIR.stat().st_mtime_ns
+        except OSError:
+            return []
+        
+        if self._runs_cache is None or self._runs_cache[0] != mtime:
+            # os.scandir: is_dir() sale del propio listado y solo los runs de entrenamiento
+            # o predicción hacen stat(), una sola vez cada uno
+            with os.scandir(self.RUNS_DIR) as entries:
+                run_entries = [(entry.stat().st_mtime, entry) for entry in entries
+                               if entry.name.startswith(("train", "predict")) and entry.is_dir()]
             # Ordenar por fecha de modificación
-            return max(train_dirs, key=lambda x: x.stat().st_mtime)
-        return None
+            run_entries.sort(key=lambda item: item[0], reverse=True)
+            # Entrenamientos y predicciones se separan en el mismo escaneo
+            runs = {run_prefix: [Path(entry.path) for _, entry in run_entries if entry.name.startswith(run_prefix)]
+                    for run_prefix in ("train", "predict")}
+            # Ambos tipos juntos, ya ordenados con las mismas fechas (sin volver a hacer stat)
+            runs["all"] = [Path(entry.path) for _, entry in run_entries]
+            self._runs_cache = (mtime, runs)
+        
+        return self._runs_cache[1][prefix]
+    
+    def invalidate_runs_cache(self):
+        """Forzar un nuevo escaneo de RUNS_DIR (la resolución del mtime puede ser de segundos)"""
+        self._runs_cache = None
+    
+    def get_latest_train_run(self):
+        """Obtener el directorio del último entrenamiento"""
+        train_dirs = self._cached_runs("train")
+        return train_dirs[0] if train_dirs else None
     
     def get_latest_predict_run(self):
         """Obtener el directorio de la última predicción"""
-        predict_dirs = []
-        if self.RUNS_DIR.exists():
-            for item in self.RUNS_DIR.iterdir():
-                if item.is_dir() and item.name.startswith("predict"):
-                    predict_dirs.append(item)
-        
-        if predict_dirs:
-            # Ordenar por fecha de modificación
-            return max(predict_dirs, key=lambda x: x.stat().st_mtime)
-        return None
+        predict_dirs = self._cached_runs("predict")
+        return predict_dirs[0] if predict_dirs else None
     
     def get_all_train_runs(self):
         """Obtener todos los directorios de entrenamiento"""
-        train_dirs = []
-        if self.RUNS_DIR.exists():
-            for item in self.RUNS_DIR.iterdir():
-                if item.is_dir() and item.name.startswith("train"):
-                    train_dirs.append(item)
-        
-        return sorted(train_dirs, key=lambda x: x.stat().st_mtime, reverse=True)
+        # Copia: quien llama puede modificar la lista sin alterar la caché
+        return list(self._cached_runs("train"))
     
     def get_all_predict_runs(self):
         """Obtener todos los directorios de predicción"""
-        predict_dirs = []
-        if self.RUNS_DIR.exists():
-            for item in self.RUNS_DIR.iterdir():
-                if item.is_dir() and item.name.startswith("predict"):
-                    predict_dirs.append(item)
-        
-        return sorted(predict_dirs, key=lambda x: x.stat().st_mtime, reverse=True)
+        return list(self._cached_runs("predict"))
+    
+    def get_all_runs(self):
+        """Obtener todos los entrenamientos y predicciones (más recientes primero)"""
+        return list(self._cached_runs("all"))
 
 # Instancia global de configuración
 config = Config()
@@ -2,11 +2,18 @@
 Sistema de logging para la aplicación
 """
 
+import atexit
 import logging
 import os
+import queue
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
 from pathlib import Path
 from datetime import datetime
 
+# Tamaño máximo de cada archivo de log y número de copias rotadas que se conservan
+LOG_MAX_BYTES = 5_000_000
+LOG_BACKUP_COUNT = 3
+
 class AppLogger:
     """Clase para manejar logging de la aplicación"""
     
@@ -30,9 +37,10 @@ class AppLogger:
             '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
         )
         
-        # Handler para archivo
+        # Handler para archivo (rotado; el archivo se abre con el primer mensaje)
         log_file = self.log_dir / f"{self.name}_{datetime.now().strftime('%Y%m%d')}.log"
-        file_handler = logging.FileHandler(log_file, encoding='utf-8')
+        file_handler = RotatingFileHandler(log_file, maxBytes=LOG_MAX_BYTES, backupCount=LOG_BACKUP_COUNT,
+                                           encoding='utf-8', delay=True)
         file_handler.setLevel(logging.DEBUG)
         file_handler.setFormatter(formatter)
         
@@ -41,9 +49,15 @@ class AppLogger:
         console_handler.setLevel(logging.INFO)
         console_handler.setFormatter(formatter)
         
+        # Las escrituras a archivo y consola se hacen en el hilo del QueueListener,
+        # no en el hilo (normalmente el de la interfaz) que emite el mensaje
+        log_queue = queue.SimpleQueue()
+        self.listener = QueueListener(log_queue, file_handler, console_handler, respect_handler_level=True)
+        self.listener.start()
+        atexit.register(self.listener.stop)
+        
         # Agregar handlers
-        self.logger.addHandler(file_handler)
-        self.logger.addHandler(console_handler)
+        self.logger.addHandler(QueueHandler(log_queue))
     
     def debug(self, message):
         """Log debug"""
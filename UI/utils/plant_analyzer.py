@@ -2,10 +2,79 @@
 Utilidades para análisis de afectación en hojas
 """
 
+import os
 import cv2
 import numpy as np
-from pathlib import Path
-from typing import Dict, List, Tuple, Optional
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache, partial
+from typing import Dict, Tuple, Optional
+
+from utils import plant_kernels
+
+# Extensiones de los recortes que se analizan
+CROP_EXTENSIONS = frozenset(('jpg', 'jpeg', 'png'))
+
+# Lado máximo (px) al que se reducen los recortes del análisis por lotes: los porcentajes
+# son proporciones y apenas cambian al reducir el área
+ANALYSIS_MAX_SIDE = 256
+
+# Decodificación reducida (1/2 por lado) del análisis por lotes: el decodificador JPEG omite
+# coeficientes en lugar de decodificar a resolución completa y luego reducir. Se usa 1/2 y no
+# 1/4 porque muchos recortes ya son pequeños; ANALYSIS_MAX_SIDE termina de ajustar el tamaño.
+# Solo se conserva en recortes de más del doble del lado objetivo (ver _cached_analysis_bgr)
+ANALYSIS_DECODE_FLAG = cv2.IMREAD_REDUCED_COLOR_2
+
+# Recortes ya reducidos para el análisis que se conservan en memoria entre análisis de la
+# sesión (cada uno ocupa como mucho ANALYSIS_MAX_SIDE² x 3 bytes: ~50 MB en el peor caso)
+IMAGE_CACHE_SIZE = 256
+
+# Con menos recortes que esto el análisis se hace en serie (repartirlo no compensa)
+PARALLEL_MIN_IMAGES = 16
+
+def load_bgr(image_path) -> Optional[np.ndarray]:
+    """Cargar una imagen BGR a resolución completa (sin caché: ocuparía demasiada memoria)"""
+    return cv2.imread(str(image_path))
+
+@lru_cache(maxsize=IMAGE_CACHE_SIZE)
+def _cached_analysis_bgr(path: str, mtime_ns: int, max_side: int) -> Optional[np.ndarray]:
+    """Decodificar y reducir un recorte una sola vez por versión del archivo (compartido: solo lectura)"""
+    img = cv2.imread(path, ANALYSIS_DECODE_FLAG)
+    # A la mitad no llega a max_side: el recorte no supera 2x max_side y reducirlo le quitaría
+    # píxeles (sus porcentajes dejarían de coincidir con el análisis a resolución completa).
+    # Se vuelve a decodificar completo; en recortes tan pequeños la segunda lectura cuesta poco
+    if img is not None and max(img.shape[:2]) <= max_side:
+        img = cv2.imread(path)
+    if img is None:
+        return None
+    
+    scale = max_side / max(img.shape[:2])
+    if scale < 1:
+        img = cv2.resize(img, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+    img.setflags(write=False)
+    return img
+
+def _load_analysis_bgr(image_path, max_side: int) -> Optional[np.ndarray]:
+    """Cargar un recorte ajustado a max_side, reutilizándolo mientras el archivo no cambie"""
+    path = str(image_path)
+    try:
+        mtime_ns = os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+    return _cached_analysis_bgr(path, mtime_ns, max_side)
+
+@lru_cache(maxsize=128)
+def _render_stats_banner(text_info: Tuple[str, ...]) -> np.ndarray:
+    """Dibujar una vez el texto de estadísticas (blanco sobre negro) para reutilizarlo"""
+    font, scale, thickness = cv2.FONT_HERSHEY_SIMPLEX, 0.7, 2
+    sizes = [cv2.getTextSize(text, font, scale, thickness) for text in text_info]
+    width = 10 + max(w for (w, _), _ in sizes) + thickness
+    height = 30 + 25 * (len(text_info) - 1) + max(baseline for _, baseline in sizes) + thickness
+    
+    banner = np.zeros((height, width, 3), dtype=np.uint8)
+    for i, text in enumerate(text_info):
+        cv2.putText(banner, text, (10, 30 + i * 25), font, scale, (255, 255, 255), thickness)
+    banner.setflags(write=False)
+    return banner
 
 class PlantAnalyzer:
     """Clase para análisis de afectación en plantas"""
@@ -36,125 +105,185 @@ class PlantAnalyzer:
             "afectado": [0, 255, 255], # Amarillo
             "severo": [0, 0, 128]      # Marrón oscuro
         }
+        
+        # Etiqueta de cada estado (0 = fondo) y paleta indexada por etiqueta
+        self.states = list(self.color_ranges)
+        self._palette = np.array([[0, 0, 0]] + [self.visualization_colors[state] for state in self.states],
+                                 dtype=np.uint8)
+        
+        # Límites [h_min, h_max, s_min, s_max, v_min, v_max] por etiqueta para el kernel de Numba
+        self._bounds = np.array([[self.color_ranges[state]["lower"][0], self.color_ranges[state]["upper"][0],
+                                  self.color_ranges[state]["lower"][1], self.color_ranges[state]["upper"][1],
+                                  self.color_ranges[state]["lower"][2], self.color_ranges[state]["upper"][2]]
+                                 for state in self.states], dtype=np.int64)
+        
+        # Los mismos límites como enteros de Python: comparar uint8 con un int no promociona
+        # el canal a int64 (con escalares de NumPy cada comparación crearía una copia ancha)
+        self._thresholds = [(label, tuple(int(x) for x in self.color_ranges[state]["lower"]),
+                             tuple(int(x) for x in self.color_ranges[state]["upper"]))
+                            for label, state in enumerate(self.states, start=1)]
+        
+        # Brillo (V = máx. de B, G, R) mínimo para que un píxel pueda ser planta
+        self._min_value = min(lower[2] for _, lower, _ in self._thresholds)
     
-    def analyze_leaf_damage(self, image_path: str) -> Optional[Dict]:
+    def classify_pixels(self, hsv_img: np.ndarray) -> np.ndarray:
+        """
+        Clasificar cada píxel en una sola pasada
+        
+        Args:
+            hsv_img: Imagen en HSV (rango de OpenCV, H en 0-180)
+            
+        Returns:
+            np.ndarray: Etiqueta por píxel (0 = fondo, i = i-ésimo estado de color_ranges)
+        """
+        h, s, v = hsv_img[..., 0], hsv_img[..., 1], hsv_img[..., 2]
+        labels = np.zeros(h.shape, dtype=np.uint8)
+        
+        # Los rangos de tono no se solapan: cada píxel recibe como máximo un estado
+        for label, lower, upper in self._thresholds:
+            in_range = ((h >= lower[0]) & (h <= upper[0]) &
+                        (s >= lower[1]) & (s <= upper[1]) &
+                        (v >= lower[2]) & (v <= upper[2]))
+            labels[in_range] = label
+        
+        return labels
+    
+    def analyze_leaf_damage(self, image_path: str, return_visualization: bool = False,
+                            max_side: Optional[int] = None) -> Optional[Dict]:
         """
         Analizar daño en una hoja individual
         
         Args:
             image_path: Ruta a la imagen de la hoja
+            return_visualization: Incluir máscaras, overlay e imagen original en el resultado
+            max_side: Decodificar a resolución reducida y ajustar la imagen a este lado máximo
+                      antes de clasificar (se ignora si return_visualization; los porcentajes
+                      son proporciones y total_pixels queda en la resolución reducida)
             
         Returns:
             Dict: Resultados del análisis o None si falla
         """
         try:
-            # Cargar imagen
-            img = cv2.imread(str(image_path))
+            # Cargar imagen (la versión reducida sale de la caché si ya se analizó en esta sesión)
+            downscale = bool(max_side) and not return_visualization
+            img = _load_analysis_bgr(image_path, max_side) if downscale else load_bgr(image_path)
             if img is None:
                 return None
             
-            # Convertir a HSV
-            hsv_img = cv2.cvtColor(img, cv2.COLOR_BGR2HSV)
-            
-            # Crear máscaras para cada estado
-            masks = {}
-            pixel_counts = {}
+            if img.max() < self._min_value:
+                # Recorte negro o casi negro: ningún píxel alcanza el brillo de ningún estado
+                labels = np.zeros(img.shape[:2], dtype=np.uint8)
+                counts = np.zeros(len(self.states) + 1, dtype=np.int64)
+                counts[0] = labels.size
+            elif plant_kernels.NUMBA_AVAILABLE:
+                # HSV, umbrales y conteo fusionados en un kernel paralelo (sin imagen HSV intermedia)
+                labels, counts = plant_kernels.classify_bgr(img, self._bounds)
+            else:
+                # Convertir a HSV, etiquetar cada píxel y contar todos los estados con un solo bincount
+                hsv_img = cv2.cvtColor(img, cv2.COLOR_BGR2HSV)
+                labels = self.classify_pixels(hsv_img)
+                counts = np.bincount(labels.ravel(), minlength=len(self.states) + 1)
             
-            for state, color_range in self.color_ranges.items():
-                mask = cv2.inRange(hsv_img, color_range["lower"], color_range["upper"])
-                masks[state] = mask
-                pixel_counts[state] = cv2.countNonZero(mask)
+            pixel_counts = {state: int(counts[label]) for label, state in enumerate(self.states, start=1)}
             
             # Calcular total de píxeles de la planta
             total_plant_pixels = sum(pixel_counts.values())
             
             if total_plant_pixels == 0:
-                return {
+                result = {
                     "sano": 0.0,
                     "afectado": 0.0,
                     "severo": 0.0,
                     "afectacion_total": 0.0,
                     "total_pixels": 0,
-                    "masks": masks,
-                    "original_image": img
+                    "pixel_counts": pixel_counts
+                }
+            else:
+                # Calcular porcentajes
+                percentages = {}
+                for state, count in pixel_counts.items():
+                    percentages[state] = (count / total_plant_pixels) * 100
+                
+                result = {
+                    "sano": percentages["sano"],
+                    "afectado": percentages["afectado"],
+                    "severo": percentages["severo"],
+                    # Afectación total
+                    "afectacion_total": percentages["afectado"] + percentages["severo"],
+                    "total_pixels": total_plant_pixels,
+                    "pixel_counts": pixel_counts
                 }
             
-            # Calcular porcentajes
-            percentages = {}
-            for state, count in pixel_counts.items():
-                percentages[state] = (count / total_plant_pixels) * 100
-            
-            # Afectación total
-            afectacion_total = percentages["afectado"] + percentages["severo"]
-            
-            # Crear máscara superpuesta para visualización
-            overlay_mask = np.zeros_like(img)
-            for state, mask in masks.items():
-                color = self.visualization_colors[state]
-                overlay_mask[mask > 0] = color
-            
-            return {
-                "sano": percentages["sano"],
-                "afectado": percentages["afectado"],
-                "severo": percentages["severo"],
-                "afectacion_total": afectacion_total,
-                "total_pixels": total_plant_pixels,
-                "pixel_counts": pixel_counts,
-                "masks": masks,
-                "overlay_mask": overlay_mask,
-                "original_image": img
-            }
+            # Las máscaras y el overlay (~4 bytes por píxel) solo se construyen si se van a dibujar
+            if return_visualization:
+                result["masks"] = {state: (labels == label).astype(np.uint8) * 255
+                                   for label, state in enumerate(self.states, start=1)}
+                # Máscara superpuesta para visualización (consulta en la paleta por etiqueta)
+                result["overlay_mask"] = self._palette[labels]
+                # Lectura propia a resolución completa (no viene de la caché)
+                result["original_image"] = img
+            
+            return result
             
         except Exception as e:
             print(f"Error analizando imagen {image_path}: {e}")
             return None
     
-    def analyze_crops_directory(self, crops_dir: str) -> Dict:
+    def analyze_crops_directory(self, crops_dir: str, max_side: Optional[int] = ANALYSIS_MAX_SIDE) -> Dict:
         """
         Analizar todas las imágenes recortadas en un directorio
         
         Args:
             crops_dir: Directorio con subcarpetas de crops por categoría
+            max_side: Lado máximo al que se reduce cada recorte (None = resolución completa)
             
         Returns:
             Dict: Resultados organizados por imagen y categoría
         """
         results = {}
-        crops_path = Path(crops_dir)
         
-        if not crops_path.exists():
+        if not os.path.isdir(crops_dir):
             return results
         
-        # Iterar por cada categoría (subcarpeta)
-        for category_dir in crops_path.iterdir():
-            if not category_dir.is_dir():
-                continue
-                
-            category_name = category_dir.name
-            
-            # Procesar cada imagen en la categoría
-            for image_file in category_dir.iterdir():
-                if image_file.suffix.lower() not in ['.jpg', '.jpeg', '.png']:
-                    continue
-                
-                # Extraer número de imagen del nombre del archivo
-                try:
-                    # Asumir formato imgXXX...
-                    image_num = int(image_file.stem[3:6])
-                except (ValueError, IndexError):
-                    continue
-                
-                # Analizar la imagen
-                analysis_result = self.analyze_leaf_damage(str(image_file))
-                if analysis_result:
-                    # Organizar resultados
-                    if image_num not in results:
-                        results[image_num] = {}
+        # Reunir primero los recortes a analizar: (número de imagen, categoría, ruta).
+        # os.scandir entrega nombre y ruta como str sin crear un Path por archivo
+        jobs = []
+        with os.scandir(crops_dir) as categories:
+            category_dirs = [entry for entry in categories if entry.is_dir()]
+        
+        for category_dir in category_dirs:
+            with os.scandir(category_dir.path) as entries:
+                for entry in entries:
+                    name, dot, suffix = entry.name.rpartition('.')
+                    if not dot or suffix.lower() not in CROP_EXTENSIONS:
+                        continue
                     
-                    if category_name not in results[image_num]:
-                        results[image_num][category_name] = []
+                    # Extraer número de imagen del nombre del archivo
+                    try:
+                        # Asumir formato imgXXX...
+                        image_num = int(name[3:6])
+                    except ValueError:
+                        continue
                     
-                    results[image_num][category_name].append(analysis_result)
+                    jobs.append((image_num, category_dir.name, entry.path))
+        
+        # Cada recorte es independiente: repartirlos entre hilos cuando hay suficientes.
+        # Hilos y no procesos: este análisis corre en un QThread de la interfaz (un fork de un
+        # proceso Qt multihilo puede bloquearse y spawn reimportaría toda la GUI en cada
+        # proceso); OpenCV y el kernel de Numba liberan el GIL mientras trabajan
+        paths = [path for _, _, path in jobs]
+        workers = os.cpu_count() or 1
+        analyze = partial(self.analyze_leaf_damage, max_side=max_side)
+        if len(jobs) < PARALLEL_MIN_IMAGES or workers == 1:
+            analysis_results = map(analyze, paths)
+        else:
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                analysis_results = list(executor.map(analyze, paths))
+        
+        # Organizar resultados por imagen y categoría
+        for (image_num, category_name, _), analysis_result in zip(jobs, analysis_results):
+            if analysis_result:
+                results.setdefault(image_num, {}).setdefault(category_name, []).append(analysis_result)
         
         return results
     
@@ -177,18 +306,26 @@ class PlantAnalyzer:
                 if not results_list:
                     continue
                 
-                # Calcular promedios para esta categoría e imagen
-                avg_sano = np.mean([r["sano"] for r in results_list])
-                avg_afectado = np.mean([r["afectado"] for r in results_list])
-                avg_severo = np.mean([r["severo"] for r in results_list])
-                avg_afectacion_total = np.mean([r["afectacion_total"] for r in results_list])
+                # Calcular promedios para esta categoría e imagen en una sola pasada
+                sum_sano = sum_afectado = sum_severo = sum_afectacion_total = 0.0
+                for r in results_list:
+                    sum_sano += r["sano"]
+                    sum_afectado += r["afectado"]
+                    sum_severo += r["severo"]
+                    sum_afectacion_total += r["afectacion_total"]
+                
+                count = len(results_list)
+                avg_sano = sum_sano / count
+                avg_afectado = sum_afectado / count
+                avg_severo = sum_severo / count
+                avg_afectacion_total = sum_afectacion_total / count
                 
                 summary[image_num][category] = {
                     "sano": avg_sano,
                     "afectado": avg_afectado,
                     "severo": avg_severo,
                     "afectacion_total": avg_afectacion_total,
-                    "count": len(results_list)
+                    "count": count
                 }
         
         return summary
@@ -207,8 +344,11 @@ class PlantAnalyzer:
             bool: True si se guardó correctamente
         """
         try:
+            # Los resultados del análisis por lotes no traen overlay: recalcularlo para esta imagen
             if "overlay_mask" not in analysis_result:
-                return False
+                analysis_result = self.analyze_leaf_damage(image_path, return_visualization=True)
+                if analysis_result is None:
+                    return False
             
             original = analysis_result["original_image"]
             overlay = analysis_result["overlay_mask"]
@@ -217,19 +357,19 @@ class PlantAnalyzer:
             alpha = 0.6
             combined = cv2.addWeighted(original, 1-alpha, overlay, alpha, 0)
             
-            # Agregar texto con estadísticas
-            text_info = [
+            # Agregar texto con estadísticas: el texto es blanco, así que el máximo por píxel
+            # con el banner en caché equivale a dibujarlo (recortado a la imagen)
+            text_info = (
                 f"Sano: {analysis_result['sano']:.1f}%",
                 f"Afectado: {analysis_result['afectado']:.1f}%",
                 f"Severo: {analysis_result['severo']:.1f}%",
                 f"Total Afectacion: {analysis_result['afectacion_total']:.1f}%"
-            ]
-            
-            y_offset = 30
-            for i, text in enumerate(text_info):
-                y_pos = y_offset + (i * 25)
-                cv2.putText(combined, text, (10, y_pos), 
-                           cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 255, 255), 2)
+            )
+            banner = _render_stats_banner(text_info)
+            height = min(banner.shape[0], combined.shape[0])
+            width = min(banner.shape[1], combined.shape[1])
+            region = combined[:height, :width]
+            np.maximum(region, banner[:height, :width], out=region)
             
             # Guardar imagen
             cv2.imwrite(str(output_path), combined)
@@ -237,4 +377,4 @@ class PlantAnalyzer:
             
         except Exception as e:
             print(f"Error guardando visualización: {e}")
-            return False
\ No newline at end of file
+            return False
@@ -3,10 +3,95 @@ Utilidades de validación para la aplicación
 """
 
 import os
+import sys
+import importlib.util
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from importlib.metadata import version, PackageNotFoundError
 from pathlib import Path
 from typing import List, Dict, Optional, Tuple
 from utils.config import config
 
+# Extensiones de imagen aceptadas (en minúsculas, para str.endswith)
+VALID_IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp', '.tiff', '.tif')
+
+# Distribuciones de pip que pueden proporcionar cv2 (para leer su versión instalada)
+OPENCV_DISTRIBUTIONS = ("opencv-python", "opencv-contrib-python",
+                        "opencv-python-headless", "opencv-contrib-python-headless")
+
+# Paquetes requeridos: (clave en los resultados de validación, módulo a buscar)
+REQUIRED_PACKAGES = [
+    ("pytorch", "torch"),
+    ("opencv", "cv2"),
+    ("ultralytics", "ultralytics"),
+    ("pyqt6", "PyQt6")
+]
+
+@lru_cache(maxsize=1)
+def _check_packages() -> Tuple[Tuple[str, bool], ...]:
+    """Versión de Python y paquetes instalados (no cambian durante el proceso: se calcula una vez)"""
+    checks = [("python_version", sys.version_info >= (3, 8))]
+    # find_spec solo consulta los buscadores de módulos, sin importarlos
+    # (importar torch para comprobar que existe cuesta cientos de ms)
+    checks += [(key, importlib.util.find_spec(module_name) is not None)
+               for key, module_name in REQUIRED_PACKAGES]
+    return tuple(checks)
+
+def _installed_version(*distributions: str) -> Optional[str]:
+    """Versión instalada de la primera distribución encontrada (lee solo sus metadatos)"""
+    for distribution in distributions:
+        try:
+            return version(distribution)
+        except PackageNotFoundError:
+            continue
+    return None
+
+@lru_cache(maxsize=2)
+def _package_details(include_cuda: bool) -> Tuple[str, ...]:
+    """Líneas con las versiones de PyTorch/OpenCV (y estado de CUDA si se pide) para el reporte (se calcula una vez)"""
+    packages = dict(_check_packages())
+    details = []
+    
+    # Las versiones salen de los metadatos instalados, sin ejecutar el código de los paquetes
+    torch_version = _installed_version("torch") if packages["pytorch"] else None
+    if torch_version:
+        details.append(f"PyTorch versión: {torch_version}")
+    
+    # Consultar CUDA sí exige importar torch (e inicializar CUDA): solo si se pide
+    if include_cuda and packages["pytorch"]:
+        try:
+            import torch
+            details.append(f"CUDA disponible: {torch.cuda.is_available()}")
+            if torch.cuda.is_available():
+                details.append(f"GPUs disponibles: {torch.cuda.device_count()}")
+        except:
+            pass
+    
+    opencv_version = _installed_version(*OPENCV_DISTRIBUTIONS) if packages["opencv"] else None
+    if opencv_version:
+        details.append(f"OpenCV versión: {opencv_version}")
+    
+    return tuple(details)
+
+def _list_names(directory: Path) -> Dict[str, bool]:
+    """Nombre (normalizado) -> es directorio, de cada entrada de un directorio; vacío si no se puede leer"""
+    try:
+        with os.scandir(directory) as entries:
+            # is_dir() sale del propio listado (d_type) sin un stat aparte en la mayoría de sistemas
+            return {os.path.normcase(entry.name): entry.is_dir() for entry in entries}
+    except OSError:
+        return {}
+
+@lru_cache(maxsize=1)
+def _io_executor() -> ThreadPoolExecutor:
+    """Hilos para listar directorios en paralelo (se crean una vez y se reutilizan)"""
+    return ThreadPoolExecutor(max_workers=4, thread_name_prefix="validators-io")
+
+@lru_cache(maxsize=1)
+def _valid_class_ids() -> frozenset:
+    """IDs de clase del dataset (config.CLASSES no cambia durante la ejecución)"""
+    return frozenset(config.CLASSES)
+
 class SystemValidator:
     """Validador del sistema y requisitos"""
     
@@ -23,41 +108,12 @@ class SystemValidator:
             "directories": False
         }
         
-        # Validar versión de Python
-        import sys
-        if sys.version_info >= (3, 8):
-            results["python_version"] = True
+        # Validar versión de Python y paquetes (en caché durante todo el proceso)
+        results.update(_check_packages())
         
-        # Validar PyTorch
-        try:
-            import torch
-            results["pytorch"] = True
-        except ImportError:
-            pass
-        
-        # Validar OpenCV
-        try:
-            import cv2
-            results["opencv"] = True
-        except ImportError:
-            pass
-        
-        # Validar Ultralytics
-        try:
-            import ultralytics
-            results["ultralytics"] = True
-        except ImportError:
-            pass
-        
-        # Validar PyQt6
-        try:
-            import PyQt6
-            results["pyqt6"] = True
-        except ImportError:
-            pass
-        
-        # Validar dataset
-        if config.DATA_YAML.exists():
+        # Dataset y directorios se comprueban siempre: pueden crearse con la aplicación abierta
+        # Validar dataset (os.path.isfile/isdir: solo responden sí/no, sin crear stat_result)
+        if os.path.isfile(config.DATA_YAML):
             results["dataset"] = True
         
         # Validar directorios
@@ -67,100 +123,115 @@ class SystemValidator:
             config.TEST_IMAGES_DIR
         ]
         
-        if all(d.exists() for d in required_dirs):
+        if all(os.path.isdir(d) for d in required_dirs):
             results["directories"] = True
         
         return results
     
     @staticmethod
-    def get_validation_report() -> str:
-        """Obtener reporte de validación"""
+    def get_validation_report(include_cuda: bool = True) -> str:
+        """Obtener reporte de validación (include_cuda=False evita importar torch para consultar la GPU)"""
         results = SystemValidator.validate_environment()
         
-        report = "VALIDACIÓN DEL SISTEMA\n"
-        report += "=" * 30 + "\n\n"
-        
         status_map = {True: "✅", False: "❌"}
         
-        report += f"Python (>= 3.8): {status_map[results['python_version']]}\n"
-        report += f"PyTorch: {status_map[results['pytorch']]}\n"
-        report += f"OpenCV: {status_map[results['opencv']]}\n"
-        report += f"Ultralytics: {status_map[results['ultralytics']]}\n"
-        report += f"PyQt6: {status_map[results['pyqt6']]}\n"
-        report += f"Dataset: {status_map[results['dataset']]}\n"
-        report += f"Directorios: {status_map[results['directories']]}\n\n"
-        
-        # Información adicional
-        report += "INFORMACIÓN ADICIONAL:\n"
-        report += "-" * 25 + "\n"
-        
-        try:
-            import torch
-            report += f"PyTorch versión: {torch.__version__}\n"
-            report += f"CUDA disponible: {torch.cuda.is_available()}\n"
-            if torch.cuda.is_available():
-                report += f"GPUs disponibles: {torch.cuda.device_count()}\n"
-        except:
-            pass
+        # Líneas en una lista y un solo join al final
+        parts = [
+            "VALIDACIÓN DEL SISTEMA",
+            "=" * 30,
+            "",
+            f"Python (>= 3.8): {status_map[results['python_version']]}",
+            f"PyTorch: {status_map[results['pytorch']]}",
+            f"OpenCV: {status_map[results['opencv']]}",
+            f"Ultralytics: {status_map[results['ultralytics']]}",
+            f"PyQt6: {status_map[results['pyqt6']]}",
+            f"Dataset: {status_map[results['dataset']]}",
+            f"Directorios: {status_map[results['directories']]}",
+            "",
+            # Información adicional
+            "INFORMACIÓN ADICIONAL:",
+            "-" * 25
+        ]
         
-        try:
-            import cv2
-            report += f"OpenCV versión: {cv2.__version__}\n"
-        except:
-            pass
+        parts.extend(_package_details(include_cuda))
         
-        report += f"Dataset ubicación: {config.DATASET_DIR}\n"
-        report += f"Contenido ubicación: {config.CONTENT_DIR}\n"
+        parts.append(f"Dataset ubicación: {config.DATASET_DIR}")
+        parts.append(f"Contenido ubicación: {config.CONTENT_DIR}")
         
-        return report
+        return "\n".join(parts) + "\n"
+    
+    @staticmethod
+    def clear_cache():
+        """Olvidar los paquetes detectados (p. ej. tras instalar dependencias)"""
+        _check_packages.cache_clear()
+        _package_details.cache_clear()
     
     @staticmethod
     def validate_model_file(model_path: str) -> bool:
         """Validar archivo de modelo"""
-        path = Path(model_path)
-        return path.exists() and path.suffix == '.pt' and path.stat().st_size > 0
+        if not str(model_path).endswith('.pt'):
+            return False
+        # Un solo stat: getsize falla si el archivo no existe
+        try:
+            return os.path.getsize(model_path) > 0
+        except OSError:
+            return False
     
     @staticmethod
     def validate_image_file(image_path: str) -> bool:
         """Validar archivo de imagen"""
-        path = Path(image_path)
-        valid_extensions = {'.jpg', '.jpeg', '.png', '.bmp', '.tiff', '.tif'}
-        return path.exists() and path.suffix.lower() in valid_extensions
+        return str(image_path).lower().endswith(VALID_IMAGE_EXTENSIONS) and os.path.isfile(image_path)
     
     @staticmethod
     def validate_directory_structure() -> List[str]:
         """Validar estructura de directorios"""
         issues = []
         
+        # Un os.scandir por directorio padre en lugar de un stat por ruta comprobada
+        listings = {}
+        
+        def exists(path: Path, directory: bool = True) -> bool:
+            """La ruta existe (y es un directorio, salvo directory=False)"""
+            parent = path.parent
+            if parent not in listings:
+                listings[parent] = _list_names(parent)
+            is_dir = listings[parent].get(os.path.normcase(path.name))
+            return is_dir is not None and (is_dir or not directory)
+        
         # Verificar directorios principales
-        if not config.CONTENT_DIR.exists():
+        if not exists(config.CONTENT_DIR):
             issues.append(f"Directorio content no encontrado: {config.CONTENT_DIR}")
         
-        if not config.DATASET_DIR.exists():
+        if not exists(config.DATASET_DIR):
             issues.append(f"Directorio del dataset no encontrado: {config.DATASET_DIR}")
         
-        if not config.TEST_IMAGES_DIR.exists():
+        if not exists(config.TEST_IMAGES_DIR):
             issues.append(f"Directorio test_images no encontrado: {config.TEST_IMAGES_DIR}")
         
         # Verificar estructura del dataset
-        if config.DATASET_DIR.exists():
+        if exists(config.DATASET_DIR):
             required_subdirs = ['train', 'valid', 'test']
+            # Los listados de cada split son independientes: se leen a la vez para solapar
+            # la latencia en discos de red (NFS/SMB); en un SSD local apenas cambia nada
+            split_dirs = [config.DATASET_DIR / subdir for subdir in required_subdirs
+                          if exists(config.DATASET_DIR / subdir)]
+            listings.update(zip(split_dirs, _io_executor().map(_list_names, split_dirs)))
             for subdir in required_subdirs:
                 subdir_path = config.DATASET_DIR / subdir
-                if not subdir_path.exists():
+                if not exists(subdir_path):
                     issues.append(f"Subdirectorio del dataset faltante: {subdir_path}")
                 else:
                     images_path = subdir_path / "images"
                     labels_path = subdir_path / "labels"
                     
-                    if not images_path.exists():
+                    if not exists(images_path):
                         issues.append(f"Directorio de imágenes faltante: {images_path}")
                     
-                    if not labels_path.exists():
+                    if not exists(labels_path):
                         issues.append(f"Directorio de etiquetas faltante: {labels_path}")
         
         # Verificar archivo data.yaml
-        if not config.DATA_YAML.exists():
+        if not exists(config.DATA_YAML, directory=False):
             issues.append(f"Archivo data.yaml no encontrado: {config.DATA_YAML}")
         
         return issues
@@ -196,10 +267,11 @@ class InputValidator:
         if not selected_classes:
             return True, "Sin filtro de clases (se detectarán todas)"
         
-        valid_classes = set(config.CLASSES.keys())
-        invalid_classes = set(selected_classes) - valid_classes
+        valid_classes = _valid_class_ids()
         
-        if invalid_classes:
+        # Caso habitual (todas válidas): comprobar sin construir conjuntos intermedios
+        if not all(class_id in valid_classes for class_id in selected_classes):
+            invalid_classes = set(selected_classes) - valid_classes
             return False, f"Clases inválidas: {invalid_classes}"
         
         return True, f"Clases válidas seleccionadas: {selected_classes}"
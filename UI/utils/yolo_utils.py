@@ -2,13 +2,69 @@
 Utilidades para el procesamiento con YOLO
 """
 
-import subprocess
+import json
 import os
-import shutil
+import subprocess
+import sys
+import threading
+from collections import OrderedDict
 from pathlib import Path
 from typing import Optional, List, Dict
 from utils.config import config
 
+# Carga diferida de los módulos CUDA: solo se cargan los kernels que se lanzan. Se fija al
+# importar, antes de que torch se cargue aquí o en los procesos hijos de entrenamiento
+# (heredan el entorno); un valor definido por el usuario se respeta
+os.environ.setdefault("CUDA_MODULE_LOADING", "LAZY")
+
+# Programa del proceso hijo de train_model: importa ultralytics/torch allí y no en la interfaz
+TRAIN_CHILD_CODE = (
+    "import json, sys\n"
+    "from ultralytics import YOLO\n"
+    "YOLO(sys.argv[1]).train(**json.loads(sys.argv[2]))\n"
+)
+
+# Modelos YOLO que se mantienen cargados a la vez (cada uno ocupa memoria de GPU/RAM)
+MODEL_CACHE_SIZE = 2
+
+# Modelos YOLO ya cargados, por (ruta, st_mtime_ns), del menos al más recientemente usado: se
+# comparten entre instancias y predicciones para no volver a leer los pesos (un .pt reentrenado
+# invalida su entrada)
+_model_cache = OrderedDict()
+_warmed_models = set()
+
+# Protege la caché si la precarga y una predicción piden un modelo a la vez
+_model_lock = threading.Lock()
+
+def _get_model(model_path):
+    """Obtener (clave, modelo YOLO) de una ruta, cargándolo solo si no está en la caché"""
+    # Importación diferida: ultralytics/torch solo se cargan al predecir o entrenar
+    from ultralytics import YOLO
+    
+    path = str(model_path)
+    key = (path, os.stat(path).st_mtime_ns)
+    with _model_lock:
+        if key in _model_cache:
+            _model_cache.move_to_end(key)
+            return key, _model_cache[key]
+        
+        # Descartar versiones anteriores del mismo archivo y, si sigue llena, los menos usados
+        for old_key in [k for k in _model_cache if k[0] == path]:
+            _evict_model(old_key)
+        while len(_model_cache) >= MODEL_CACHE_SIZE:
+            _evict_model(next(iter(_model_cache)))
+        
+        _model_cache[key] = YOLO(path)
+        return key, _model_cache[key]
+
+def _evict_model(key):
+    """Sacar un modelo de la caché y devolver al driver la memoria de GPU que ya no se usa"""
+    del _model_cache[key]
+    _warmed_models.discard(key)
+    torch = sys.modules.get("torch")
+    if torch is not None and torch.cuda.is_available():
+        torch.cuda.empty_cache()
+
 class YOLOProcessor:
     """Clase para manejar operaciones de YOLO"""
     
@@ -39,31 +95,57 @@ class YOLOProcessor:
             if not data_yaml.exists():
                 raise FileNotFoundError("Archivo data.yaml no encontrado")
             
-            # Cambiar al directorio content para ejecutar el comando
-            original_dir = os.getcwd()
-            os.chdir(self.config.CONTENT_DIR)
-            
-            # Comando de entrenamiento
-            cmd = [
-                "yolo", "task=detect", "mode=train",
-                f"model={model_path}",
-                f"data={data_yaml}",
-                f"epochs={epochs}",
-                f"imgsz={imgsz}",
-                f"batch={batch}",
-                "plots=True"
-            ]
+            # API de ultralytics en un proceso aparte (como el TrainingWorker de la interfaz):
+            # torch y la memoria del entrenamiento no quedan en el proceso que llama, y el
+            # directorio de trabajo no cambia
+            train_args = {
+                "data": str(data_yaml),
+                "epochs": epochs,
+                "imgsz": imgsz,
+                "batch": batch,
+                "plots": True,
+                "project": str(self.config.RUNS_DIR),
+                "name": "train"
+            }
+            result = subprocess.run([sys.executable, "-c", TRAIN_CHILD_CODE,
+                                     str(model_path), json.dumps(train_args)])
+            if result.returncode != 0:
+                raise RuntimeError(f"el proceso de entrenamiento terminó con código {result.returncode}")
+            
+            # El run nuevo debe aparecer aunque el mtime de RUNS_DIR no haya cambiado de tick
+            self.config.invalidate_runs_cache()
+            
+            return True
             
-            # Ejecutar comando
-            process = subprocess.run(cmd, capture_output=True, text=True)
+        except Exception as e:
+            print(f"Error en entrenamiento: {e}")
+            return False
+    
+    def preload_model(self, model_path: str, imgsz: int = 640) -> bool:
+        """
+        Cargar un modelo y hacer una inferencia de calentamiento (una vez por proceso)
+        
+        La primera inferencia paga la inicialización de CUDA y de los kernels; hacerla
+        de antemano deja la predicción real en su latencia estable.
+        
+        Args:
+            model_path: Ruta del modelo
+            imgsz: Tamaño de la imagen de calentamiento
             
-            # Restaurar directorio original
-            os.chdir(original_dir)
+        Returns:
+            bool: True si el modelo quedó cargado
+        """
+        try:
+            import numpy as np
             
-            return process.returncode == 0
+            key, model = _get_model(model_path)
+            if key not in _warmed_models:
+                model.predict(np.zeros((imgsz, imgsz, 3), dtype=np.uint8), verbose=False)
+                _warmed_models.add(key)
+            return True
             
         except Exception as e:
-            print(f"Error en entrenamiento: {e}")
+            print(f"Error precargando modelo: {e}")
             return False
     
     def predict_images(self, source_path: str, model_path: Optional[str] = None,
@@ -95,36 +177,26 @@ class YOLOProcessor:
             if not Path(model_path).exists():
                 raise FileNotFoundError(f"Modelo {model_path} no encontrado")
             
-            # Cambiar al directorio content
-            original_dir = os.getcwd()
-            os.chdir(self.config.CONTENT_DIR)
-            
-            # Construir comando
-            cmd = [
-                "yolo", "task=detect", "mode=predict",
-                f"model={model_path}",
-                f"conf={conf}",
-                f"source={source_path}"
-            ]
-            
-            if save_crops:
-                cmd.append("save_crop=True")
-            
-            if classes:
-                classes_str = "[" + ",".join(map(str, classes)) + "]"
-                cmd.append(f"classes={classes_str}")
-            
-            # Ejecutar comando
-            process = subprocess.run(cmd, capture_output=True, text=True)
-            
-            # Restaurar directorio
-            os.chdir(original_dir)
-            
-            if process.returncode == 0:
-                return self.config.get_latest_predict_run()
-            else:
-                print(f"Error en predicción: {process.stderr}")
-                return None
+            # Predecir con la API de ultralytics reutilizando el modelo ya cargado.
+            # save=True como en el CLI; los resultados van a RUNS_DIR/predictN
+            _, model = _get_model(model_path)
+            results = model.predict(
+                source=str(source_path),
+                conf=conf,
+                save=True,
+                save_crop=save_crops,
+                classes=classes or None,
+                project=str(self.config.RUNS_DIR),
+                name="predict",
+                stream=True
+            )
+            
+            # Consumir el generador sin acumular los resultados de todas las imágenes
+            for _ in results:
+                pass
+            self.config.invalidate_runs_cache()
+            
+            return Path(model.predictor.save_dir)
                 
         except Exception as e:
             print(f"Error en predicción: {e}")
@@ -141,15 +213,20 @@ class YOLOProcessor:
             Dict: Información del modelo
         """
         info = {
-            "exists": Path(model_path).exists(),
+            "exists": False,
             "size": 0,
             "modified": None
         }
         
-        if info["exists"]:
-            path = Path(model_path)
-            info["size"] = path.stat().st_size
-            info["modified"] = path.stat().st_mtime
+        # Un solo stat para existencia, tamaño y fecha
+        try:
+            stat = os.stat(model_path)
+        except OSError:
+            return info
+        
+        info["exists"] = True
+        info["size"] = stat.st_size
+        info["modified"] = stat.st_mtime
         
         return info
     
@@ -168,7 +245,5 @@ class YOLOProcessor:
         elif run_type == "predict":
             return self.config.get_all_predict_runs()
         else:
-            train_runs = self.config.get_all_train_runs()
-            predict_runs = self.config.get_all_predict_runs()
-            all_runs = train_runs + predict_runs
-            return sorted(all_runs, key=lambda x: x.stat().st_mtime, reverse=True)
+            # Ya ordenados por fecha en el mismo escaneo de RUNS_DIR (un stat por run)
+            return self.config.get_all_runs()